@@ -0,0 +1,227 @@
+# batch.py
+"""
+批量扫描（multi-target）
+用法：
+    python scanner.py -t targets.txt --output-dir reports -w 4 --per-host 1 --profile quick
+
+targets 文件格式：每行一个目标，`#` 开头为注释；URL 之后可以跟 key=value 选项：
+    http://10.0.0.5:8080/ username=admin password=password pages=50
+    http://10.0.0.6/app/ pages=10 output=app6.html
+
+调度策略：
+- 每个目标在一个 worker 进程中完整执行（crawl + detect + report），进程池在整个批次内复用。
+- 按 host 轮询（round-robin）派发任务，同一 host 同时进行的目标数不超过 per_host，
+  这样多个 host 可以并行推进，而不会有一个 host 被集中压测。
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing.util import Finalize
+from urllib.parse import urlparse
+from utils.logger import get_logger, setup_logging, shutdown_logging, logging_config
+
+logger = get_logger("batch")
+
+TARGET_OPTIONS = ("username", "password", "pages", "output")
+
+
+def parse_target_line(line, default_pages=None, default_username=None, default_password=None):
+    """Parse one targets-file line into a dict, or return None for blank/comment lines (pages None = from profile)."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    parts = line.split()
+    target = {
+        "url": parts[0],
+        "username": default_username,
+        "password": default_password,
+        "pages": default_pages,
+        "output": None,
+    }
+    for opt in parts[1:]:
+        key, sep, value = opt.partition("=")
+        if not sep or key not in TARGET_OPTIONS:
+            raise ValueError(f"Invalid target option {opt!r} in line: {line}")
+        target[key] = int(value) if key == "pages" else value
+    return target
+
+
+def load_targets(path, default_pages=None, default_username=None, default_password=None):
+    targets = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            t = parse_target_line(line, default_pages, default_username, default_password)
+            if t:
+                targets.append(t)
+    return targets
+
+
+def report_name(url):
+    """Build a filesystem-safe report file name from a target URL."""
+    parsed = urlparse(url)
+    name = f"{parsed.netloc}{parsed.path}".strip("/")
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", name) or "target"
+    return f"{name}.html"
+
+
+def qualified_report_name(name, url):
+    """`name` with the scheme and a short hash of the full URL added: unique per URL."""
+    base, ext = os.path.splitext(name)
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:8]
+    return f"{urlparse(url).scheme}_{base}_{digest}{ext or '.html'}"
+
+
+def assign_report_names(targets):
+    """
+    Copies of `targets` with a unique "output" each. Targets that differ only by scheme or query string get
+    the same report_name(); every member of such a group gets qualified_report_name() instead, so reports
+    and .state.json files never overwrite each other and don't depend on the order of the targets file.
+    Explicit outputs are kept unless several targets ask for the same one.
+    """
+    auto = Counter(report_name(t["url"]) for t in targets if not t.get("output"))
+    explicit = Counter(t["output"] for t in targets if t.get("output"))
+    named = []
+    for t in targets:
+        if t.get("output"):
+            name = t["output"]
+            ambiguous = explicit[name] > 1
+        else:
+            name = report_name(t["url"])
+            ambiguous = auto[name] > 1 or name in explicit
+        named.append(dict(t, output=qualified_report_name(name, t["url"]) if ambiguous else name))
+    return named
+
+
+def group_by_host(targets):
+    """Group targets by host (netloc), keeping input order inside a host: OrderedDict host -> deque."""
+    queues = OrderedDict()
+    for t in targets:
+        host = urlparse(t["url"]).netloc
+        queues.setdefault(host, deque()).append(t)
+    return queues
+
+
+def _init_worker(log_config):
+    # the parent's listener thread doesn't exist in the worker: start one with the same settings,
+    # and flush it when the worker exits (atexit doesn't run in pool workers)
+    setup_logging(**(log_config or {}))
+    Finalize(None, shutdown_logging, exitpriority=10)
+
+
+def _run_target(target, output_dir, incremental=False, scan_options=None):
+    """Worker entry point: scan a single target and return a JSON-able summary."""
+    from scanner import scan_target
+    from utils import http as http_utils
+    from utils.metrics import metrics
+
+    # worker processes are reused across targets: drop cookies from the previous target
+    http_utils.session.cookies.clear()
+    metrics.reset()
+
+    output = os.path.join(output_dir, target.get("output") or report_name(target["url"]))
+    state = os.path.splitext(output)[0] + ".state.json" if incremental else None
+    result = {"url": target["url"], "report": output, "pages": 0, "findings": 0,
+              "by_severity": {}, "by_type": {}, "saved_requests": 0, "error": None}
+    t0 = time.time()
+    try:
+        pages_count, findings, stats = scan_target(target["url"], output, pages=target["pages"],
+                                                   username=target.get("username"),
+                                                   password=target.get("password"),
+                                                   state=state, **(scan_options or {}))
+        result["saved_requests"] = stats.get("saved_requests", 0)
+        result["pages"] = pages_count
+        result["findings"] = len(findings)
+        for f in findings:
+            sev = f.get("severity") or "Unknown"
+            result["by_severity"][sev] = result["by_severity"].get(sev, 0) + 1
+            typ = f.get("type") or "Unknown"
+            result["by_type"][typ] = result["by_type"].get(typ, 0) + 1
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed"] = round(time.time() - t0, 3)
+    result["metrics"] = metrics.snapshot()
+    return result
+
+
+def run_batch(targets, output_dir, workers=4, per_host=1, incremental=False, scan_options=None):
+    """
+    Scan all targets with a shared process pool and write `summary.json` into output_dir.
+    incremental: keep one incremental state file per target next to its report (see detector/incremental.py).
+    scan_options: extra keyword arguments for scanner.scan_target (profile, max_age, formats, ...);
+        the profile carries the per-worker politeness delay and request budget.
+    Returns the aggregated summary dict (also contains `path` of the summary file).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    queues = group_by_host(assign_report_names(targets))
+    in_flight = {}               # future -> (host, target)
+    host_running = {}            # host -> number of running targets
+    results = []
+    per_host = max(1, per_host)
+    workers = max(1, workers)
+
+    def submit_ready(pool):
+        # round-robin over hosts: one target per host per pass, until workers are busy
+        progressed = True
+        while progressed and len(in_flight) < workers:
+            progressed = False
+            for host in list(queues):
+                if len(in_flight) >= workers:
+                    break
+                q = queues[host]
+                if not q or host_running.get(host, 0) >= per_host:
+                    continue
+                target = q.popleft()
+                fut = pool.submit(_run_target, target, output_dir, incremental, scan_options)
+                in_flight[fut] = (host, target)
+                host_running[host] = host_running.get(host, 0) + 1
+                progressed = True
+                logger.info("started %s", target["url"])
+                if not q:
+                    del queues[host]
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(logging_config(),)) as pool:
+        submit_ready(pool)
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for fut in done:
+                host, target = in_flight.pop(fut)
+                host_running[host] -= 1
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    # worker crashed before it could report (e.g. BrokenProcessPool)
+                    res = {"url": target["url"], "error": f"{type(e).__name__}: {e}", "pages": 0, "findings": 0,
+                           "by_severity": {}, "by_type": {}, "saved_requests": 0, "report": None, "elapsed": 0}
+                results.append(res)
+                status = "FAILED " + res["error"] if res["error"] else f"{res['findings']} findings"
+                logger.info("finished %s (%s)", res["url"], status)
+            submit_ready(pool)
+
+    summary = aggregate(results)
+    summary["elapsed"] = round(time.time() - started, 3)
+    summary["path"] = os.path.join(output_dir, "summary.json")
+    with open(summary["path"], "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def aggregate(results):
+    summary = {"targets": len(results), "failed": 0, "pages": 0, "findings": 0, "saved_requests": 0,
+               "by_severity": {}, "by_type": {}, "results": sorted(results, key=lambda r: r["url"])}
+    for r in results:
+        if r.get("error"):
+            summary["failed"] += 1
+        summary["pages"] += r.get("pages", 0)
+        summary["findings"] += r.get("findings", 0)
+        summary["saved_requests"] += r.get("saved_requests", 0)
+        for key in ("by_severity", "by_type"):
+            for k, v in r.get(key, {}).items():
+                summary[key][k] = summary[key].get(k, 0) + v
+    return summary
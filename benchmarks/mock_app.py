@@ -0,0 +1,254 @@
+# benchmarks/mock_app.py
+"""
+本地 DVWA 替身（只用标准库 http.server），用于基准测试和集成测试。
+    server, base_url = start_mock_app(pages=20, forms_per_page=2, params_per_form=2, latency=0.01)
+    ...
+    server.shutdown()
+
+页面结构：
+- /                 首页，链接到所有 /page/<i> 和慢接口 /slow/<k>
+- /page/<i>         每页 forms_per_page 个表单（GET/POST 交替），action 指向 /vuln/<i>/<j>
+- /vuln/<i>/<j>     可注入接口：参数含单引号时返回 MySQL 报错；原样回显参数（反射型 XSS）；
+                    参数含 SLEEP( 时额外休眠 sleep_seconds（时间盲注）；
+                    csrf_tokens=True 时表单带一次性 user_token，token 不对的提交会被拒绝；
+                    csrf_tokens="static" 时 token 按表单固定（每会话 token），不会轮换
+- /slow/<k>         每次请求额外休眠 slow_latency 秒
+- /login.php, /logout.php  仅在 login=True 时启用：DVWA 式登录（admin/password + user_token），
+                    其它页面未登录时 302 到 login.php（login_redirect=False 时直接以 200 返回登录表单）；
+                    session_max_requests > 0 时会话在处理这么多请求后失效
+- /item.php?id=..&cat=..  query_links > 0 时每页带 query_links 个此类链接；参数与 /vuln 一样可注入
+- /files/<k>.pdf, /download/<k>  binary_files > 0 时启用：binary_size 字节的二进制下载（后者 URL 无扩展名）
+所有请求都会先休眠 latency 秒，模拟网络/服务端延迟；compress=True 时按 Accept-Encoding 返回 gzip。
+"""
+
+import argparse
+import gzip
+import html
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SQL_ERROR = "You have an error in your SQL syntax; check the manual that corresponds to your MySQL server version"
+
+
+class MockAppConfig:
+    def __init__(self, pages=20, forms_per_page=2, params_per_form=2, latency=0.0,
+                 slow_endpoints=0, slow_latency=0.5, sleep_seconds=0.0, injectable=True,
+                 login=False, login_redirect=True, session_max_requests=0, csrf_tokens=False,
+                 binary_files=0, binary_size=256 * 1024, compress=False, query_links=0):
+        self.pages = pages
+        self.forms_per_page = forms_per_page
+        self.params_per_form = params_per_form
+        self.latency = latency
+        self.slow_endpoints = slow_endpoints
+        self.slow_latency = slow_latency
+        self.sleep_seconds = sleep_seconds
+        self.injectable = injectable
+        self.login = login
+        self.login_redirect = login_redirect
+        self.session_max_requests = session_max_requests
+        self.csrf_tokens = csrf_tokens
+        self.binary_files = binary_files
+        self.binary_size = binary_size
+        self.compress = compress
+        self.query_links = query_links
+        self.tokens = {}            # "i/j" -> current single-use user_token
+        self.sessions = {}          # session id -> requests served
+        self.lock = threading.Lock()
+
+
+def _page(title, body):
+    return f"<!doctype html><html><head><title>{title}</title></head><body>{body}</body></html>"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    config = MockAppConfig()
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately; without this Nagle + delayed ACK adds ~40ms per request
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, status=200, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if self.config.compress and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            data = gzip.compress(data)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location, cookie=None):
+        self.send_response(302)
+        self.send_header("Location", location)
+        if cookie is not None:
+            self.send_header("Set-Cookie", f"PHPSESSID={cookie}; path=/")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _session_id(self):
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            key, _, value = part.strip().partition("=")
+            if key == "PHPSESSID":
+                return value
+        return None
+
+    def _authenticated(self):
+        """Check (and count a request against) the caller's session."""
+        cfg = self.config
+        sid = self._session_id()
+        with cfg.lock:
+            if sid not in cfg.sessions:
+                return False
+            cfg.sessions[sid] += 1
+            if cfg.session_max_requests and cfg.sessions[sid] > cfg.session_max_requests:
+                del cfg.sessions[sid]
+                return False
+        return True
+
+    def _login(self, params):
+        cfg = self.config
+        if self.command == "POST" and params.get("username") == "admin" and params.get("password") == "password":
+            sid = uuid.uuid4().hex
+            with cfg.lock:
+                cfg.sessions[sid] = 0
+            return self._redirect("/", cookie=sid)
+        token = uuid.uuid4().hex
+        return self._send(_page("Login", '<form action="login.php" method="post">'
+                                         '<input type="text" name="username"><input type="password" name="password">'
+                                         f'<input type="submit" name="Login" value="Login">'
+                                         f'<input type="hidden" name="user_token" value="{token}"></form>'))
+
+    def _params(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query, keep_blank_values=True)
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            params.update(parse_qs(self.rfile.read(length).decode("utf-8", "replace"), keep_blank_values=True))
+        return parsed.path, {k: v[-1] for k, v in params.items()}
+
+    def _index(self):
+        cfg = self.config
+        links = "".join(f'<a href="/page/{i}">page {i}</a>\n' for i in range(cfg.pages))
+        links += "".join(f'<a href="/slow/{k}">slow {k}</a>\n' for k in range(cfg.slow_endpoints))
+        links += "".join(f'<a href="/files/{k}.pdf">pdf {k}</a>\n<a href="/download/{k}">download {k}</a>\n'
+                         for k in range(cfg.binary_files))
+        if cfg.login:
+            links += '<a href="/logout.php">Logout</a>\n'
+
+        return _page("Mock DVWA", f"<h1>Mock DVWA</h1>\n{links}")
+
+    def _form_page(self, i):
+        cfg = self.config
+        forms = []
+        for j in range(cfg.forms_per_page):
+            method = "get" if j % 2 == 0 else "post"
+            inputs = "".join(f'<input type="text" name="p{k}" value="">' for k in range(cfg.params_per_form))
+            if cfg.csrf_tokens:
+                token = uuid.uuid4().hex
+                with cfg.lock:
+                    if cfg.csrf_tokens == "static":
+                        token = cfg.tokens.setdefault(f"{i}/{j}", token)
+                    cfg.tokens[f"{i}/{j}"] = token
+                inputs += f'<input type="hidden" name="user_token" value="{token}">'
+
+            forms.append(f'<form action="/vuln/{i}/{j}" method="{method}">{inputs}'
+                         f'<input type="submit" name="Submit" value="Submit"></form>')
+        nav = f'<a href="/page/{(i + 1) % cfg.pages}">next</a><a href="/">home</a>'
+        nav += "".join(f'<a href="/item.php?id={i * cfg.query_links + k}&cat={k}">item</a>' for k in range(cfg.query_links))
+        return _page(f"page {i}", nav + "".join(forms))
+
+    def _vuln(self, key, params):
+        cfg = self.config
+        if cfg.csrf_tokens and key is not None:
+            with cfg.lock:
+                expected = cfg.tokens.get(key) if cfg.csrf_tokens == "static" else cfg.tokens.pop(key, object())
+                valid = params.pop("user_token", None) == expected
+            if not valid:
+                return _page("error", "CSRF token is incorrect")
+        values = " ".join(params.values())
+        if cfg.injectable:
+            if "SLEEP(" in values.upper() and cfg.sleep_seconds:
+                time.sleep(cfg.sleep_seconds)
+            if "'" in values:
+                return _page("error", SQL_ERROR)
+            echoed = values
+        else:
+            echoed = html.escape(values)
+        return _page("result", f"<pre>ID: {echoed}</pre>")
+
+    def _handle(self):
+        cfg = self.config
+        if cfg.latency:
+            time.sleep(cfg.latency)
+        path, params = self._params()
+        parts = [p for p in path.split("/") if p]
+        if cfg.login:
+            if parts == ["login.php"]:
+                return self._login(params)
+            if parts == ["logout.php"]:
+                with cfg.lock:
+                    cfg.sessions.pop(self._session_id(), None)
+                return self._redirect("/login.php")
+            if not self._authenticated():
+                if not cfg.login_redirect:
+                    return self._login({})
+                return self._redirect("/login.php")
+        if not parts:
+            return self._send(self._index())
+        if parts[0] == "page" and len(parts) == 2 and parts[1].isdigit():
+            return self._send(self._form_page(int(parts[1])))
+        if parts[0] == "vuln" and len(parts) == 3:
+            return self._send(self._vuln(f"{parts[1]}/{parts[2]}", params))
+        if parts == ["item.php"]:
+            return self._send(self._vuln(None, params))
+        if parts[0] in ("files", "download") and len(parts) == 2:
+            return self._send(bytes(cfg.binary_size), content_type="application/octet-stream")
+        if parts[0] == "slow" and len(parts) == 2:
+            time.sleep(cfg.slow_latency)
+            return self._send(_page("slow", "<p>slow endpoint</p><a href=\"/\">home</a>"))
+        return self._send(_page("not found", "<p>404</p>"), status=404)
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+
+def start_mock_app(host="127.0.0.1", port=0, **options):
+    """Start the mock app in a daemon thread. Returns (server, base_url); stop with server.shutdown()."""
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"config": MockAppConfig(**options)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+def main():
+    p = argparse.ArgumentParser(description="Run the mock vulnerable web app")
+    p.add_argument("--port", type=int, default=8088)
+    p.add_argument("--pages", type=int, default=20)
+    p.add_argument("--forms", type=int, default=2, help="Forms per page")
+    p.add_argument("--params", type=int, default=2, help="Injectable parameters per form")
+    p.add_argument("--latency", type=float, default=0.0, help="Artificial latency per request (seconds)")
+    p.add_argument("--slow", type=int, default=0, help="Number of slow endpoints")
+    p.add_argument("--slow-latency", type=float, default=0.5)
+    args = p.parse_args()
+    server, url = start_mock_app(port=args.port, pages=args.pages, forms_per_page=args.forms,
+                                 params_per_form=args.params, latency=args.latency,
+                                 slow_endpoints=args.slow, slow_latency=args.slow_latency)
+    print(f"Mock app listening on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# benchmarks/run_benchmarks.py
+"""
+基准测试：在本地 mock 应用上跑 Crawler 和各个 detector，记录吞吐 / 请求数 / 耗时 / 内存峰值。
+用法：
+    python benchmarks/run_benchmarks.py -o bench.json
+    python benchmarks/run_benchmarks.py -o bench.json --baseline benchmarks/baseline.json --tolerance 0.25
+每个场景重复运行 --repeat 次（默认 5），记录并比较各指标的中位数：单次爬取只有零点几秒，单次计时的噪声
+远大于 tolerance。与 baseline 比较时，任一指标（中位数）劣化超过 tolerance 则退出码为 1。
+
+核数扩展（utils.analysis 进程池）：多个 I/O 线程把页面原始 bytes 交给解析 / 匹配，对比 0（线程内，受 GIL 限制）
+与 1..N 个 analysis worker 的吞吐，需在多核机器上运行：
+    python benchmarks/run_benchmarks.py --scaling -o scaling.json
+    python benchmarks/run_benchmarks.py --scaling --scaling-workers 0,4,8,16,32 --io-threads 64
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_app import start_mock_app
+from crawler.crawler import Crawler, parse_page
+from detector.sqli_detector import SQLiDetector, match_response
+from detector.xss_detector import XSSDetector
+from detector.csrf_detector import CSRFDetector
+from utils.metrics import metrics
+from utils.analysis import AnalysisPool, install_pool, analyze
+
+# name -> mock app options; sized so that the crawl and each detector take long enough to time reliably
+SCENARIOS = {
+    "small": {"pages": 40, "forms_per_page": 2, "params_per_form": 2},
+    "wide-forms": {"pages": 15, "forms_per_page": 4, "params_per_form": 6},
+    "latency": {"pages": 30, "forms_per_page": 1, "params_per_form": 2, "latency": 0.005,
+                "slow_endpoints": 2, "slow_latency": 0.2},
+}
+
+DEFAULT_REPEAT = 5
+
+# metric -> True if higher is better
+COMPARED_METRICS = {
+    "crawl.pages_per_sec": True,
+    "total_wall": False,
+    "peak_memory": False,
+    "detectors.sqli.requests_per_finding": False,
+    "detectors.xss.requests_per_finding": False,
+}
+
+
+def _timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - t0
+
+
+def median_result(runs):
+    """Merge repeated results of one scenario: the median of every numeric field (counts are identical)."""
+    first = runs[0]
+    if isinstance(first, dict):
+        return {key: median_result([r.get(key) for r in runs]) if isinstance(value, (dict, int, float))
+                and not isinstance(value, bool) else value for key, value in first.items()}
+    values = [r for r in runs if isinstance(r, (int, float))]
+    if len(values) != len(runs):
+        return first
+    median = statistics.median(values)
+    return type(first)(median) if isinstance(first, int) else round(median, 4)
+
+
+def run_scenario(name, options, repeat=1):
+    """Run the scenario `repeat` times against one mock app; the result holds the median of each metric."""
+    server, base_url = start_mock_app(**options)
+    try:
+        runs = [_run_once(name, options, base_url) for _ in range(max(1, repeat))]
+    finally:
+        server.shutdown()
+        server.server_close()
+    result = median_result(runs)
+    result["options"] = options
+    result["repeat"] = len(runs)
+    result["total_wall_runs"] = [r["total_wall"] for r in runs]
+    return result
+
+
+def _run_once(name, options, base_url):
+    try:
+        metrics.reset()
+        tracemalloc.start()
+        t_start = time.perf_counter()
+
+        max_pages = options.get("pages", 10) + options.get("slow_endpoints", 0) + 1
+        crawler = Crawler(base_url, max_pages=max_pages)
+        pages, crawl_wall = _timed(crawler.crawl)
+        forms = [form for page in pages for form in page.forms]
+        crawl_requests = metrics.snapshot()["requests"]
+        result = {
+            "scenario": name,
+            "options": options,
+            "crawl": {
+                "pages": len(pages),
+                "forms": len(forms),
+                "requests": crawl_requests,
+                "wall": round(crawl_wall, 4),
+                "pages_per_sec": round(len(pages) / crawl_wall, 2) if crawl_wall else 0.0,
+            },
+            "detectors": {},
+        }
+
+        for det_name, detector in (("sqli", SQLiDetector()), ("xss", XSSDetector()), ("csrf", CSRFDetector())):
+            before = metrics.snapshot()["detector_requests"].get(det_name, 0)
+
+            def run_detector():
+                found = []
+                with metrics.detector(det_name), metrics.phase("payload"):
+                    for form in forms:
+                        found.extend(detector.test_form(form))
+                return found
+
+            findings, wall = _timed(run_detector)
+            requests_sent = metrics.snapshot()["detector_requests"].get(det_name, 0) - before
+            result["detectors"][det_name] = {
+                "findings": len(findings),
+                "requests": requests_sent,
+                "wall": round(wall, 4),
+                "requests_per_finding": round(requests_sent / len(findings), 2) if findings else None,
+            }
+
+        result["total_wall"] = round(time.perf_counter() - t_start, 4)
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        result["requests"] = metrics.snapshot()["requests"]
+        return result
+    finally:
+        tracemalloc.stop()
+
+
+def synthetic_page(index, forms=40, links=200):
+    """A large, parse-heavy HTML page as raw bytes (what an I/O thread hands to the analysis pool)."""
+    parts = [f"<html><head><title>page {index}</title></head><body><h1>Page {index}</h1>"]
+    for i in range(forms):
+        parts.append(f'<form action="/p{index}/f{i}" method="post">'
+                     f'<input name="q{i}" type="text" value="v{i}"><input name="id" type="hidden" value="{i}">'
+                     f'<textarea name="t{i}">text</textarea><input type="submit" value="Go"></form>')
+    for i in range(links):
+        parts.append(f'<p>Item {i} <a href="/page/{index}/{i}?id={i}&cat=2">link {i}</a> lorem ipsum dolor</p>')
+    return "".join(parts).encode("utf-8") + b"</body></html>"
+
+
+def default_scaling_workers():
+    cpus = os.cpu_count() or 1
+    counts, n = [0], 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    return counts + [cpus]
+
+
+def run_scaling(worker_counts, pages=400, io_threads=16, batch_size=16):
+    """
+    Parse + match `pages` synthetic responses from `io_threads` threads, inline (0) and with each number of
+    analysis worker processes; returns one result per worker count with pages/s and speedup over inline.
+    """
+    bodies = [synthetic_page(i) for i in range(min(pages, 32))]
+
+    def analyze_one(i):
+        body = bodies[i % len(bodies)]
+        parsed = analyze(parse_page, body, "utf-8", f"http://bench.local/page/{i}")
+        analyze(match_response, body, "utf-8", "' OR '1'='1")
+        return len(parsed["forms"])
+
+    results = []
+    for workers in worker_counts:
+        pool = AnalysisPool(workers, batch_size) if workers > 0 else None
+        install_pool(pool)
+        try:
+            if pool is not None:
+                # start the worker processes (fork + imports) before timing
+                for f in [pool.submit(parse_page, bodies[0], "utf-8", "http://bench.local/") for _ in range(workers * 2)]:
+                    f.result()
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=io_threads) as threads:
+                forms = sum(threads.map(analyze_one, range(pages)))
+            wall = time.perf_counter() - t0
+        finally:
+            install_pool(None)
+            if pool is not None:
+                pool.close()
+        res = {"analysis_workers": workers, "pages": pages, "forms": forms, "wall": round(wall, 4),
+               "pages_per_sec": round(pages / wall, 2) if wall else 0.0}
+        if pool is not None:
+            res["batches"] = pool.batches
+        results.append(res)
+    inline = results[0]["pages_per_sec"] if results and results[0]["analysis_workers"] == 0 else None
+    for res in results:
+        res["speedup"] = round(res["pages_per_sec"] / inline, 2) if inline else None
+    return results
+
+
+def _lookup(data, dotted):
+    for key in dotted.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(current, baseline, tolerance=0.25):
+    """Return a list of regression messages (empty if within tolerance)."""
+    regressions = []
+    base_by_name = {r["scenario"]: r for r in baseline.get("results", [])}
+    for res in current["results"]:
+        base = base_by_name.get(res["scenario"])
+        # a baseline recorded with other scenario options measures a different workload
+        if not base or base.get("options") != res.get("options"):
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            cur, old = _lookup(res, metric), _lookup(base, metric)
+            if not cur or not old:
+                continue
+            change = (cur - old) / old
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append(f"{res['scenario']}: {metric} {old} -> {cur} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser(description="Crawler/detector benchmarks against a local mock app")
+    p.add_argument("-o", "--output", default="bench_output.json")
+    p.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                   help="Scenario to run (repeatable, default: all)")
+    p.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                   help="Runs per scenario; medians are recorded and compared (default: %(default)s)")
+    p.add_argument("--scaling", action="store_true",
+                   help="Measure response-analysis throughput vs. analysis worker processes instead")
+    p.add_argument("--scaling-workers", default=None,
+                   help="Comma-separated worker counts (default: 0,1,2,4,... up to the CPU count)")
+    p.add_argument("--scaling-pages", type=int, default=400)
+    p.add_argument("--io-threads", type=int, default=16)
+    p.add_argument("--analysis-batch", type=int, default=16)
+    args = p.parse_args()
+
+    if args.scaling:
+        counts = ([int(n) for n in args.scaling_workers.split(",")] if args.scaling_workers
+                  else default_scaling_workers())
+        scaling = run_scaling(counts, pages=args.scaling_pages, io_threads=args.io_threads,
+                              batch_size=args.analysis_batch)
+        for res in scaling:
+            print(f"[scaling] {res['analysis_workers']:>3} workers: {res['pages_per_sec']} pages/s "
+                  f"(x{res['speedup']})")
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "io_threads": args.io_threads,
+            "scaling": scaling,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+        return
+
+    # warm-up run so lazy imports / first-use allocations don't skew the first scenario
+    run_scenario("warmup", {"pages": 1, "forms_per_page": 1, "params_per_form": 1})
+
+    results = []
+    for name in args.scenario or sorted(SCENARIOS):
+        res = run_scenario(name, SCENARIOS[name], repeat=args.repeat)
+        results.append(res)
+        print(f"[bench] {name}: {res['crawl']['pages']} pages @ {res['crawl']['pages_per_sec']} pages/s, "
+              f"{res['requests']} requests, {res['total_wall']}s (median of {res['repeat']}), "
+              f"peak {res['peak_memory'] / 1024:.0f} KiB")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for r in regressions:
+            print(f"[regression] {r}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,114 @@
 # crawler/crawler.py
+import logging
+import time
 import requests                                 # <<< ADDED: need requests for session login
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from utils.http import safe_get
+from collections import deque
+from urllib.parse import urljoin, urlparse, parse_qsl, urlunparse
+import os
+from utils import analysis
+from utils.http import safe_get, throttle, consume_budget, ACCEPT_ENCODING
+from utils.metrics import metrics
+from utils.session import SessionManager
+from utils.logger import get_logger, SAMPLED
+
+logger = get_logger("crawler")
+
+# links with these extensions are never fetched: they can't contain forms or links we could parse
+SKIP_EXTENSIONS = {
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".odt",
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".svg", ".webp", ".tif", ".tiff",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".rar", ".7z", ".tar", ".jar", ".war",
+    ".exe", ".msi", ".dmg", ".iso", ".apk", ".bin", ".deb", ".rpm",
+    ".mp3", ".mp4", ".avi", ".mov", ".mkv", ".wav", ".ogg", ".webm", ".flv",
+    ".woff", ".woff2", ".ttf", ".eot", ".otf", ".css", ".js", ".map",
+}
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+# pages fetched but not yet parsed when an analysis pool is installed (fetching continues meanwhile)
+PARSE_WINDOW = 32
+
+
+def is_skipped_url(url):
+    """True if the URL path ends with an extension that never holds HTML."""
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    return ext in SKIP_EXTENSIONS
+
+
+def parse_forms(soup, base_url):
+    """(action, method, inputs) of every form in the parsed page."""
+    forms = []
+    for f in soup.find_all("form"):
+        action = f.get("action")
+        action = urljoin(base_url, action) if action else base_url
+        method = f.get("method", "get").lower()
+        inputs = []
+        for inp in f.find_all(["input", "textarea", "select"]):
+            name = inp.get("name")
+            if not name: 
+                continue
+            typ = inp.get("type", "text")
+            value = inp.get("value", "")
+            inputs.append({"name": name, "type": typ, "value": value})
+        forms.append((action, method, inputs))
+    return forms
+
+
+def parse_links(soup, base_url):
+    """Absolute URLs of every <a href> in the parsed page (unfiltered)."""
+    return [urljoin(base_url, a['href']) for a in soup.find_all("a", href=True)]
+
+
+def parse_page(body, encoding, base_url):
+    """
+    Decode and parse one page (a single BeautifulSoup pass for forms and links). Plain data in and out,
+    so it can run in a utils.analysis worker process.
+    """
+    t0 = time.perf_counter()
+    html = analysis.decode(body, encoding)
+    soup = BeautifulSoup(html, "lxml")
+    forms = parse_forms(soup, base_url)
+    return {
+        "html": html,
+        "forms": forms,
+        "links": parse_links(soup, base_url),
+        # page contains "<form" but the parser found none: worth a warning
+        "unparsed_forms": not forms and "<form" in html.lower(),
+        "elapsed": time.perf_counter() - t0,
+    }
+
 
 class Form:
-    def __init__(self, action, method, inputs):
+    def __init__(self, action, method, inputs, page_url=None):
         self.action = action
         self.method = method
         self.inputs = inputs
+        self.page_url = page_url    # page the form was found on (used to fetch fresh CSRF tokens)
+
+class QueryForm(Form):
+    """
+    Synthetic GET "form" built from a link's query string (e.g. page.php?id=3&cat=2).
+    One QueryForm stands for a whole template (path + parameter-name set); it is probed once on a
+    representative URL and its findings apply to every URL in `template_urls`.
+    """
+    source = "query"
+
+    def __init__(self, action, inputs, template, template_urls):
+        super().__init__(action, "get", inputs)
+        self.template = template
+        self.template_urls = template_urls
+
+
+def query_template(url):
+    """(template key, action URL, params) for a URL with a query string, or None."""
+    parsed = urlparse(url)
+    params = parse_qsl(parsed.query, keep_blank_values=True)
+    if not params:
+        return None
+    action = urlunparse(parsed._replace(query="", fragment=""))
+    names = sorted({k for k, _ in params})
+    return f"{action}?{'&'.join(n + '=' for n in names)}", action, params
+
 
 class Page:
     def __init__(self, url, html, forms):
@@ -17,156 +117,222 @@ class Page:
         self.forms = forms
 
 class Crawler:
-    def __init__(self, base_url, max_pages=30, allowed_domain=None, login_url=None, login_data=None):
+    def __init__(self, base_url, max_pages=30, allowed_domain=None, login_url=None, login_data=None,
+                 session_manager=None, timeout=10):
         self.base_url = base_url.rstrip('/')
         self.max_pages = max_pages
+        self.timeout = timeout
         self.allowed_domain = allowed_domain or urlparse(self.base_url).netloc
         self.visited = set()
         self.pages = []
+        self.skipped = set()        # URLs filtered by extension, never requested
+        self.templates = {}         # query template -> {"action", "params", "urls" (ordered set)}
+        # transfer accounting: bytes on the wire / after decoding, and what pre-filtering avoided
+        self.stats = {"skipped_extension": 0, "skipped_content_type": 0, "skipped_too_large": 0,
+                      "bytes_skipped": 0, "bytes_wire": 0, "bytes_decoded": 0}
 
-        # <<< ADDED: create a requests.Session to keep cookies after login
-        self.session = requests.Session()
-        # set a conservative User-Agent (you can adjust)
-        self.session.headers.update({"User-Agent": "WebScanner/1.0"})
+        # <<< MODIFIED: session/login handling lives in utils.session.SessionManager
+        if session_manager is None:
+            # create a requests.Session to keep cookies after login
+            session = requests.Session()
+            # set a conservative User-Agent (you can adjust)
+            session.headers.update({"User-Agent": "WebScanner/1.0", "Accept-Encoding": ACCEPT_ENCODING})
+            session_manager = SessionManager(session, self.base_url, timeout=timeout)
+        self.session_manager = session_manager
+        self.session = session_manager.session
 
         if login_url and login_data:
             self.login(login_url, login_data)
 
     def login(self, login_url, login_data):
-        """
-        <<< MODIFIED >>>
-        基于 DVWA 登录:
-        1) 获取登录页面，查找动作以‘login.php’结尾的表单
-        2) 提取表单中的输入（用户名、密码、登录和隐藏的user_token）
-        3) 将提取的隐藏输入合并到login_data和POST中
-        4) 通过检查基本页面的“Logout”或其他指标来验证登录
-        """
-        try:
-            # 1) GET login page to extract token and real form fields
-            r_get = self.session.get(login_url, timeout=10, allow_redirects=True)
-            if not r_get:
-                print(f"[!] Failed to GET login page: {login_url}")
-                return
-            soup = BeautifulSoup(r_get.text, "lxml")
-
-            # Find the form element that posts to login.php (relative or absolute)
-            login_form = None
-            for f in soup.find_all("form"):
-                action = f.get("action", "")
-                # normalize action to check endswith login.php
-                if action and action.strip().lower().endswith("login.php"):
-                    login_form = f
-                    break
-            # fallback: if not found, just take the first form
-            if login_form is None:
-                forms = soup.find_all("form")
-                if forms:
-                    login_form = forms[0]
-
-            # collect default hidden/input fields from the login form
-            extracted = {}
-            if login_form:
-                for inp in login_form.find_all(["input", "textarea", "select"]):
-                    name = inp.get("name")
-                    if not name:
-                        continue
-                    # prioritize hidden or existing values
-                    val = inp.get("value", "")
-                    typ = inp.get("type", "").lower()
-                    # include hidden token or other hidden defaults
-                    if typ == "hidden" or val:
-                        extracted[name] = val
-
-            # 2) merge provided login_data with extracted hidden inputs (without overwriting username/password if present)
-            merged = {}
-            merged.update(extracted)      # hidden fields first
-            merged.update(login_data or {})  # provided username/password override if present
-            # Ensure "Login" submit value exists if form used a submit input with name=Login
-            if "Login" not in merged:
-                # try to see if login_form has a submit input with name "Login"
-                if login_form:
-                    sub = login_form.find("input", {"type": "submit"})
-                    if sub and sub.get("name"):
-                        merged[sub.get("name")] = sub.get("value", "")
-                    else:
-                        # default DVWA uses name "Login"
-                        merged["Login"] = "Login"
-                else:
-                    merged["Login"] = "Login"
-
-            # 3) POST to login_url (use absolute URL)
-            post_url = urljoin(login_url, login_form.get("action")) if login_form and login_form.get("action") else login_url
-            r_post = self.session.post(post_url, data=merged, timeout=10, allow_redirects=True)
-
-            # 4) verify: request base page and check for indicators of logged-in state
-            r_check = self.session.get(self.base_url, timeout=10, allow_redirects=True)
-            check_text = r_check.text if r_check else ""
-            if r_check and ("Logout" in check_text or "logout.php" in check_text or "Security Level" in check_text or "Username:" in check_text):
-                print("[+] Login successful")
-            else:
-                print(f"[!] Login may have failed (post_status={getattr(r_post,'status_code', None)}).")
-                # print snippet to help debugging
-                snippet = (check_text or "")[:400].replace("\n", " ")
-                print(f"[debug] post-login page snippet: {snippet!r}")
-
-        except Exception as e:
-            print(f"[!] Login exception: {e}")
+        self.session_manager.login_url = login_url
+        self.session_manager.login_data = login_data
+        return self.session_manager.login()
 
     def _extract_forms(self, html, base_url):
         soup = BeautifulSoup(html, "lxml")
-        forms = []
-        for f in soup.find_all("form"):
-            action = f.get("action")
-            action = urljoin(base_url, action) if action else base_url
-            method = f.get("method", "get").lower()
-            inputs = []
-            for inp in f.find_all(["input", "textarea", "select"]):
-                name = inp.get("name")
-                if not name: 
-                    continue
-                typ = inp.get("type", "text")
-                value = inp.get("value", "")
-                inputs.append({"name": name, "type": typ, "value": value})
-            forms.append(Form(action, method, inputs))
-        return forms
+        return [Form(action, method, inputs, page_url=base_url)
+                for action, method, inputs in parse_forms(soup, base_url)]
 
     def _extract_links(self, html, base_url):
-        soup = BeautifulSoup(html, "lxml")
+        return self._filter_links(parse_links(BeautifulSoup(html, "lxml"), base_url))
+
+    def _filter_links(self, urls):
+        """Same-domain, crawlable links (as a set, fragments removed)."""
         links = set()
-        for a in soup.find_all("a", href=True):
-            href = a['href']
-            full = urljoin(base_url, href)
-            if urlparse(full).netloc == self.allowed_domain:
-                links.add(full.split('#')[0])
+        for full in urls:
+            if urlparse(full).netloc != self.allowed_domain:
+                continue
+            if is_skipped_url(full):
+                if full not in self.skipped:
+                    self.skipped.add(full)
+                    self.stats["skipped_extension"] += 1
+                continue
+            # never follow logout / destructive links: they would kill the session or the app state
+            if self.session_manager.is_excluded(full):
+                continue
+            links.add(full.split('#')[0])
         return links
 
+    def _add_query_template(self, url):
+        t = query_template(url)
+        if t is None:
+            return
+        key, action, params = t
+        entry = self.templates.setdefault(key, {"action": action, "params": params, "urls": {}})
+        entry["urls"][url] = None      # dict as an ordered set
+
+    def injection_points(self):
+        """
+        One QueryForm per query-string template discovered while crawling, using the first URL seen
+        for the template as the representative (its values become the baseline).
+        """
+        points = []
+        for key, entry in self.templates.items():
+            inputs = []
+            seen = set()
+            for name, value in entry["params"]:
+                if name in seen:
+                    continue
+                seen.add(name)
+                inputs.append({"name": name, "type": "text", "value": value})
+            points.append(QueryForm(entry["action"], inputs, key, list(entry["urls"])))
+        return points
+
+    def _read_body(self, r, url):
+        """
+        Return (body, encoding) if the response is HTML, else None after closing it without downloading
+        the body. The streamed read stops at MAX_PAGE_BYTES even without (or with a wrong) Content-Length.
+        Updates self.stats with skipped and compression-saved bytes.
+        """
+        headers = getattr(r, "headers", None) or {}
+        ctype = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        length = headers.get("Content-Length")
+        length = int(length) if length and length.isdigit() else 0
+        skip = None
+        if ctype and ctype not in HTML_CONTENT_TYPES:
+            skip = "skipped_content_type"
+        elif length > MAX_PAGE_BYTES:
+            skip = "skipped_too_large"
+        if skip:
+            self.stats[skip] += 1
+            self.stats["bytes_skipped"] += length
+            if hasattr(r, "close"):
+                r.close()
+            return None
+        if not hasattr(r, "iter_content"):
+            return analysis.response_body(r)
+        chunks, decoded = [], 0
+        for chunk in r.iter_content(64 * 1024):
+            chunks.append(chunk)
+            decoded += len(chunk)
+            if decoded > MAX_PAGE_BYTES:
+                break
+        raw = getattr(r, "raw", None)
+        wire = raw.tell() if raw is not None and hasattr(raw, "tell") else 0
+        self.stats["bytes_wire"] += wire or decoded
+        if decoded > MAX_PAGE_BYTES:
+            # chunked / unlabeled large body: abort the download
+            self.stats["skipped_too_large"] += 1
+            r.close()
+            return None
+        self.stats["bytes_decoded"] += decoded
+        # bytes either way: parse_page decodes them (inline or in an analysis worker)
+        return b"".join(chunks), r.encoding
+
+    def transfer_summary(self):
+        s = self.stats
+        saved_compression = max(0, s["bytes_decoded"] - s["bytes_wire"])
+        skipped = s["skipped_extension"] + s["skipped_content_type"] + s["skipped_too_large"]
+        return (f"Crawl transfer: {s['bytes_wire'] / 1024:.1f} KiB on the wire, "
+                f"{saved_compression / 1024:.1f} KiB saved by compression, "
+                f"{skipped} non-HTML URLs skipped ({s['bytes_skipped'] / 1024:.1f} KiB not downloaded)")
+
     def crawl(self):
+        with metrics.phase("crawl"):
+            pages = self._crawl()
+        logger.info(self.transfer_summary())
+        return pages
+
+    def _crawl(self):
+        """
+        BFS crawl. Parsing goes through utils.analysis: inline by default, or in the analysis process pool,
+        in which case up to PARSE_WINDOW fetched pages are parsed in parallel while fetching continues.
+        """
         to_visit = [self.base_url]
-        while to_visit and len(self.visited) < self.max_pages:
+        parsing = deque()          # (url, future of parse_page) in fetch order
+        stopped = False
+        while to_visit or parsing:
+            # handle finished parses first: with inline parsing this keeps the plain fetch-parse-fetch order
+            if parsing and (parsing[0][1].done() or stopped or not to_visit
+                            or len(self.visited) >= self.max_pages or len(parsing) >= PARSE_WINDOW):
+                url, fut = parsing.popleft()
+                self._add_page(url, fut.result(), to_visit)
+                continue
+            if stopped or not to_visit or len(self.visited) >= self.max_pages:
+                break
             url = to_visit.pop(0)
             if url in self.visited:
                 continue
 
-            # <<< MODIFIED: use session.get so requests include login cookies
-            try:
-                r = self.session.get(url, timeout=10, allow_redirects=True)
-            except Exception:
-                # fallback to safe_get if session request fails
-                r = safe_get(url)
-            if r is None:
-                self.visited.add(url)
+            if not consume_budget():
+                logger.warning("Request budget exhausted, stopping crawl")
+                stopped = True
                 continue
-
-            html = r.text
-            forms = self._extract_forms(html, url)
-            # debug: if page contains "<form" but forms==0, print snippet
-            if "<form" in html.lower() and len(forms) == 0:
-                print(f"[warn] page contains '<form' but parser returned 0 forms for {url}. Snippet:")
-                print(html[:500])
-            self.pages.append(Page(url, html, forms))
+            body = self._fetch(url)
             self.visited.add(url)
-            links = self._extract_links(html, url)
-            for link in links:
-                if link not in self.visited and link not in to_visit:
-                    to_visit.append(link)
+            if body is not None:
+                parsing.append((url, analysis.submit(parse_page, body[0], body[1], url)))
         return self.pages
+
+    def _fetch(self, url):
+        """
+        GET one page; (body, encoding) of an HTML page, or None. A login form served in place of the page
+        (no redirect, so SessionManager.request can't see it on a streamed response) triggers one re-login
+        and re-fetch.
+        """
+        generation = self.session_manager.generation
+        r, body = self._get(url)
+        if body is not None and self.session_manager.is_logged_out(r, body):
+            body = None
+            if self.session_manager.restore(generation):
+                r, body = self._get(url)
+                # session could not be restored: this is the login page, not the page we asked for
+                if body is not None and self.session_manager.is_logged_out(r, body):
+                    body = None
+        if body is not None:
+            logger.debug("Fetched %s (%d bytes)", url, len(body[0]), extra=SAMPLED)
+        return body
+
+    def _get(self, url):
+        """(response, (body, encoding) or None) of one streamed GET."""
+        # <<< MODIFIED: use session.get so requests include login cookies
+        throttle()
+        try:
+            with metrics.request():
+                # stream=True: only headers are read here, the body is pulled in _read_body
+                r = self.session_manager.get(url, timeout=self.timeout, allow_redirects=True, stream=True)
+        except Exception:
+            metrics.request_failed()
+            # fallback to safe_get if session request fails
+            r = safe_get(url)
+        if r is None:
+            return None, None
+        return r, self._read_body(r, url)
+
+    def _add_page(self, url, parsed, to_visit):
+        html = parsed["html"]
+        forms = [Form(action, method, inputs, page_url=url) for action, method, inputs in parsed["forms"]]
+        # debug: if page contains "<form" but forms==0, log it (the HTML snippet only at DEBUG level)
+        if parsed["unparsed_forms"]:
+            logger.warning("Page contains '<form' but parser returned 0 forms for %s", url)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Snippet of %s: %r", url, html[:500])
+        self.pages.append(Page(url, html, forms))
+        links = self._filter_links(parsed["links"])
+        metrics.observe_parse(parsed["elapsed"])
+        self._add_query_template(url)
+        for link in links:
+            self._add_query_template(link)
+            if link not in self.visited and link not in to_visit:
+                to_visit.append(link)
@@ -0,0 +1,162 @@
+# detector/incremental.py
+"""
+增量（差异）扫描状态
+思路：
+- 每个表单按 (method, action, 输入名集合) 计算 fingerprint，作为状态文件中的 key。
+- 每个 key 下保存：表单结构 hash、基线响应 hash、上次的 findings、上次消耗的请求数、扫描时间。
+- 重新扫描时先发一次基线请求：结构 hash 和基线 hash 都没变、且结果未过期，则直接沿用上次 findings，
+  否则重新完整探测。沿用时节省的请求数 = 上次消耗 - 本次基线请求。
+- 基线请求和探测一样经过 TokenManager 刷新 CSRF token：带着爬取时的旧 token 提交只会拿到应用的拒绝页，
+  拒绝页不变并不能说明接口没变。
+用法：
+    store = IncrementalStore("scan_state.json", max_age=7 * 86400, tokens=tokens)
+    base = store.baseline(form)
+    cached = store.lookup(form, base)
+    ...
+    store.record(form, base, findings, requests_used)
+    store.save()
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from utils.http import safe_get
+from utils.metrics import metrics
+from utils.analysis import analyze, decode, response_body
+from utils.logger import get_logger
+
+logger = get_logger("incremental")
+
+STATE_VERSION = 1
+# hidden inputs usually carry per-request tokens; strip them so they don't change the baseline hash
+HIDDEN_INPUT_RE = re.compile(r"<input[^>]*type\s*=\s*[\"']?hidden[^>]*>", re.IGNORECASE)
+
+
+def _sha1(text):
+    return hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+
+
+def form_fingerprint(form):
+    """Stable identity of a form: method + action + sorted input names."""
+    method = (form.method or "get").lower()
+    names = sorted(inp.get("name", "") for inp in form.inputs)
+    return _sha1(f"{method} {form.action} {','.join(names)}")
+
+
+def form_structure_hash(form):
+    """Hash of the form structure (input names, types, default values except hidden ones)."""
+    parts = []
+    for inp in form.inputs:
+        typ = (inp.get("type") or "").lower()
+        value = "" if typ == "hidden" else (inp.get("value") or "")
+        parts.append(f"{inp.get('name')}|{typ}|{value}")
+    return _sha1("\n".join(sorted(parts)))
+
+
+def normalize_baseline(text):
+    return HIDDEN_INPUT_RE.sub("", text or "")
+
+
+def baseline_digest(body, encoding=None):
+    """Hash of a baseline response with hidden inputs stripped; None for an empty body (analysis worker safe)."""
+    text = decode(body, encoding)
+    return _sha1(normalize_baseline(text)) if text else None
+
+
+class IncrementalStore:
+    def __init__(self, path, max_age=7 * 86400, timeout=10, tokens=None):
+        """
+        path: JSON 状态文件路径（不存在则视为首次扫描）
+        max_age: findings 过期时间（秒），过期后强制重新探测；<= 0 表示永不过期
+        tokens: 可选 detector.token_refresh.TokenManager，基线请求前刷新 CSRF token（与探测共用）
+        """
+        self.path = path
+        self.max_age = max_age
+        self.timeout = timeout
+        self.tokens = tokens
+        self.forms = {}
+        self.reused = 0
+        self.rescanned = 0
+        self.saved_requests = 0
+        self._lock = threading.Lock()   # forms may be checked from several threads
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable incremental state %s: %s", self.path, e)
+            return
+        if state.get("version") == STATE_VERSION:
+            self.forms = state.get("forms", {})
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "forms": self.forms}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def baseline(self, form):
+        """Send the baseline request (form default values) and return its digest (None if it failed or was empty)."""
+        method = (form.method or "get").lower()
+        values = {inp["name"]: inp.get("value", "") for inp in form.inputs if inp.get("name")}
+        with metrics.phase("baseline"):
+            if self.tokens is None:
+                r = self._send(form.action, method, values)
+            else:
+                with self.tokens.fresh(form, values) as values:
+                    r = self._send(form.action, method, values)
+        if r is None:
+            return None
+        # decoding + regex over the page runs in the analysis pool when one is installed
+        return analyze(baseline_digest, *response_body(r))
+
+    def _send(self, url, method, values):
+        return safe_get(url,
+                        params=values if method == "get" else None,
+                        data=values if method == "post" else None,
+                        method=method.upper(),
+                        timeout=self.timeout)
+
+    def lookup(self, form, baseline):
+        """Return the previous findings if the form can be skipped, else None (baseline: digest from baseline())."""
+        entry = self.forms.get(form_fingerprint(form))
+        # a failed / empty baseline proves nothing about the form: always re-probe
+        if (not entry or not baseline
+                or entry.get("structure") != form_structure_hash(form)
+                or entry.get("baseline") != baseline
+                or (self.max_age > 0 and time.time() - entry.get("scanned_at", 0) > self.max_age)):
+            metrics.cache_miss("incremental")
+            return None
+        metrics.cache_hit("incremental")
+        with self._lock:
+            self.reused += 1
+            # one baseline request was still needed to validate the entry
+            self.saved_requests += max(0, entry.get("requests", 0) - 1)
+        return [dict(f) for f in entry.get("findings", [])]
+
+    def record(self, form, baseline, findings, requests_used):
+        """Store the findings of a fully probed form; ignored when its baseline failed or was empty."""
+        if not baseline:
+            return
+        entry = {
+            "action": form.action,
+            "structure": form_structure_hash(form),
+            "baseline": baseline,
+            "findings": findings,
+            "requests": requests_used,
+            "scanned_at": time.time(),
+        }
+        with self._lock:
+            self.rescanned += 1
+            self.forms[form_fingerprint(form)] = entry
+
+    def stats(self):
+        return {"reused_forms": self.reused, "rescanned_forms": self.rescanned,
+                "saved_requests": self.saved_requests}
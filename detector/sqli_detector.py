@@ -11,9 +11,15 @@
 - 对明显不可注入字段（submit、file、hidden token）跳过。
 """
 
+import logging
 import time
 from config import SQLI_PAYLOADS, SQL_ERROR_PATTERNS, DEFAULT_TIMEOUT  # <<< MODIFIED: reuse project config
 from utils.http import safe_get
+from utils.metrics import metrics
+from utils.analysis import analyze, decode, response_body
+from utils.logger import get_logger, SAMPLED
+
+logger = get_logger("detector.sqli")
 
 # <<< ADDED: DVWA-friendly extra payloads and detection thresholds
 EXTRA_PAYLOADS = [
@@ -35,61 +41,98 @@ ADDITIONAL_ERROR_PATTERNS = [
 ]
 
 
+# lowercased once at import instead of on every response
+_ERROR_PATTERNS = tuple(p.lower() for p in list(SQL_ERROR_PATTERNS or []) + ADDITIONAL_ERROR_PATTERNS if p)
+
+
 def contains_sql_error(text):
     """Case-insensitive check for SQL error fingerprints (merged from config + local)."""
     if not text:
         return False
     lower = text.lower()
-    patterns = []
-    if SQL_ERROR_PATTERNS:
-        patterns.extend([p.lower() for p in SQL_ERROR_PATTERNS])
-    patterns.extend([p.lower() for p in ADDITIONAL_ERROR_PATTERNS])
-    for p in patterns:
-        if p and p in lower:
-            return True
-    return False
+    return any(p in lower for p in _ERROR_PATTERNS)
+
+
+def response_time(r, fallback):
+    """
+    Server response time of `r`: requests' r.elapsed (request sent -> headers parsed), so politeness
+    throttling, per-form token locks and token GETs done before sending don't count as a delay.
+    """
+    elapsed = getattr(r, "elapsed", None)
+    return elapsed.total_seconds() if elapsed is not None else fallback
+
+
+def match_response(body, encoding, payload=None):
+    """
+    All per-response checks in one call (runs in a utils.analysis worker when a pool is installed):
+    (SQL error fingerprint found, payload reflected, decoded length).
+    """
+    text = decode(body, encoding)
+    return contains_sql_error(text), bool(payload) and payload in text, len(text)
 
 
 class SQLiDetector:
-    def __init__(self, timeout=DEFAULT_TIMEOUT, verbose=False):
+    def __init__(self, timeout=DEFAULT_TIMEOUT, verbose=False, tokens=None, stages=("error", "union", "time"),
+                 max_payloads=0, max_union_columns=MAX_UNION_COLUMNS, time_sleep=5,
+                 time_threshold=TIME_THRESHOLD, size_diff_threshold=SIZE_DIFF_THRESHOLD):
         """
         timeout: request timeout in seconds
-        verbose: 若为 True，会在控制台打印每个测试请求的简短信息（用于调试）
+        verbose: 若为 True，每个测试请求以 INFO 级别记录（默认 DEBUG，可用 --log-level-for detector.sqli=DEBUG 打开，按 --log-sample 采样）
+        tokens: 可选 detector.token_refresh.TokenManager，每次探测前刷新 CSRF token
+        stages / max_payloads / max_union_columns / time_*: 扫描强度，通常来自 profiles.ScanProfile
+            stages: "error"（error/reflected/size-diff payloads）、"union"、"time" 的子集
+            max_payloads: 只使用前 N 个 payload，0 表示全部
         """
         self.timeout = timeout
         self.verbose = verbose
+        self._log_level = logging.INFO if verbose else logging.DEBUG
+        self.tokens = tokens
+        self.stages = set(stages)
+        self.max_union_columns = max_union_columns
+        self.time_threshold = time_threshold
+        self.size_diff_threshold = size_diff_threshold
         # combine configured payloads + extras, but keep config order primary
         self.payloads = list(SQLI_PAYLOADS) if SQLI_PAYLOADS else []
         for p in EXTRA_PAYLOADS:
             if p not in self.payloads:
                 self.payloads.append(p)
+        if max_payloads:
+            self.payloads = self.payloads[:max_payloads]
         # time-based payloads (MySQL style)
-        self.time_payloads = ["1 AND SLEEP(5)-- ", "1' AND SLEEP(5)-- "]
+        self.time_payloads = [f"1 AND SLEEP({time_sleep})-- ", f"1' AND SLEEP({time_sleep})-- "]
 
-    def _send(self, action, params, data, method):
-        """统一发送请求（使用 safe_get），返回 response 或 None"""
+    def _send(self, action, params, data, method, form=None):
+        """统一发送请求（使用 safe_get），返回 response 或 None；传入 form 时先刷新其 CSRF token"""
         try:
-            r = safe_get(action,
-                         params=params if method.lower() == "get" else None,
-                         data=data if method.lower() == "post" else None,
-                         method=method.upper(),
-                         timeout=self.timeout)
-            return r
+            if self.tokens is None or form is None:
+                return safe_get(action,
+                                params=params if method.lower() == "get" else None,
+                                data=data if method.lower() == "post" else None,
+                                method=method.upper(),
+                                timeout=self.timeout)
+            values = params if method.lower() == "get" else data
+            with self.tokens.fresh(form, values) as values:
+                return safe_get(action,
+                                params=values if method.lower() == "get" else None,
+                                data=values if method.lower() == "post" else None,
+                                method=method.upper(),
+                                timeout=self.timeout)
         except Exception:
             return None
 
     def _log(self, *args):
-        if self.verbose:
-            print("[SQLiDetector]", *args)
+        # per-probe event: only built when enabled, and subject to sampling
+        if logger.isEnabledFor(self._log_level):
+            logger.log(self._log_level, " ".join(str(a) for a in args), extra=SAMPLED)
 
-    def _try_union(self, action, method, baseline_params, target_param, base_len):
+    def _try_union(self, action, method, baseline_params, target_param, base_len, form=None):
         """
         尝试 UNION-based 注入：构造 payload "' UNION SELECT NULL,NULL... -- "
         如果返回包含 SQL 错误或响应长度显著变化则记录线索。
         返回 list of tuples (payload, evidence)
         """
         hits = []
-        for ncols in range(1, MAX_UNION_COLUMNS + 1):
+        for ncols in range(1, self.max_union_columns + 1):
             nulls = ",".join(["NULL"] * ncols)
             payload = f"' UNION SELECT {nulls}{UNION_COMMENT}"
             test_params = baseline_params.copy()
@@ -99,17 +142,17 @@ class SQLiDetector:
             r = self._send(action,
                            params=test_params if method == "get" else None,
                            data=test_params if method == "post" else None,
-                           method=method)
+                           method=method, form=form)
             if not r:
                 continue
-            text = r.text or ""
+            sql_error, _, length = analyze(match_response, *response_body(r))
             # 1) error-based success
-            if contains_sql_error(text):
+            if sql_error:
                 hits.append((payload, "SQL error pattern in response"))
                 break
             # 2) size-diff heuristic
-            if base_len and abs(len(text) - base_len) > SIZE_DIFF_THRESHOLD:
-                hits.append((payload, f"Response size changed by {abs(len(text)-base_len)} bytes"))
+            if base_len and abs(length - base_len) > self.size_diff_threshold:
+                hits.append((payload, f"Response size changed by {abs(length-base_len)} bytes"))
                 break
         return hits
 
@@ -133,12 +176,12 @@ class SQLiDetector:
             baseline[name] = inp.get("value", "")
 
         # get baseline response
-        base_resp = self._send(action,
-                               params=baseline if method == "get" else None,
-                               data=baseline if method == "post" else None,
-                               method=method)
-        base_text = base_resp.text if base_resp else ""
-        base_len = len(base_text) if base_text else 0
+        with metrics.phase("baseline"):
+            base_resp = self._send(action,
+                                   params=baseline if method == "get" else None,
+                                   data=baseline if method == "post" else None,
+                                   method=method, form=form)
+        base_len = analyze(match_response, *response_body(base_resp))[2] if base_resp else 0
 
         # iterate inputs, skip non-injectable types
         for inp in form.inputs:
@@ -165,7 +208,7 @@ class SQLiDetector:
             orig = baseline.get(name, "")
 
             # 1) try configured payloads (error-based / reflected / size diff)
-            for payload in self.payloads:
+            for payload in (self.payloads if "error" in self.stages else ()):
                 test_params = baseline.copy()
                 test_params[name] = orig + payload
 
@@ -173,13 +216,13 @@ class SQLiDetector:
                 r = self._send(action,
                                params=test_params if method == "get" else None,
                                data=test_params if method == "post" else None,
-                               method=method)
+                               method=method, form=form)
                 if not r:
                     continue
-                text = r.text or ""
+                sql_error, reflected, length = analyze(match_response, *response_body(r), payload)
 
                 # a) error-based
-                if contains_sql_error(text):
+                if sql_error:
                     key = (action, name, payload, "sql-error")
                     if key not in seen:
                         findings.append({
@@ -194,7 +237,7 @@ class SQLiDetector:
                     break  # stop further payloads for this parameter
 
                 # b) reflection (payload appears in response)
-                if payload in text:
+                if reflected:
                     key = (action, name, payload, "reflected")
                     if key not in seen:
                         findings.append({
@@ -209,14 +252,14 @@ class SQLiDetector:
                     break
 
                 # c) simple size-diff heuristic
-                if base_len and abs(len(text) - base_len) > SIZE_DIFF_THRESHOLD:
+                if base_len and abs(length - base_len) > self.size_diff_threshold:
                     key = (action, name, payload, "size-diff")
                     if key not in seen:
                         findings.append({
                             "type": "SQLi (size-diff)",
                             "param": name,
                             "payload": payload,
-                            "evidence": f"Response size changed by {abs(len(text)-base_len)} bytes",
+                            "evidence": f"Response size changed by {abs(length-base_len)} bytes",
                             "url": action,
                             "severity": "Medium"
                         })
@@ -224,8 +267,8 @@ class SQLiDetector:
                     break
 
             # 2) if still no result for this parameter, try UNION-based heuristics
-            if not any(f['param'] == name for f in findings):
-                union_hits = self._try_union(action, method, baseline, name, base_len)
+            if "union" in self.stages and not any(f['param'] == name for f in findings):
+                union_hits = self._try_union(action, method, baseline, name, base_len, form=form)
                 for payload, evidence in union_hits:
                     key = (action, name, payload, evidence)
                     if key not in seen:
@@ -240,21 +283,22 @@ class SQLiDetector:
                         seen.add(key)
 
             # 3) time-based detection as last resort
-            if not any(f['param'] == name for f in findings):
+            if "time" in self.stages and not any(f['param'] == name for f in findings):
                 for tp in self.time_payloads:
                     test_params = baseline.copy()
                     test_params[name] = orig + tp
                     self._log("Time-based try", action, name, tp)
                     t0 = time.time()
-                    r = self._send(action,
-                                   params=test_params if method == "get" else None,
-                                   data=test_params if method == "post" else None,
-                                   method=method)
+                    with metrics.phase("time-based"):
+                        r = self._send(action,
+                                       params=test_params if method == "get" else None,
+                                       data=test_params if method == "post" else None,
+                                       method=method, form=form)
                     t1 = time.time()
                     if not r:
                         continue
-                    elapsed = t1 - t0
-                    if elapsed > TIME_THRESHOLD:
+                    elapsed = response_time(r, t1 - t0)
+                    if elapsed > self.time_threshold:
                         key = (action, name, tp, f"time-delay-{elapsed:.1f}")
                         if key not in seen:
                             findings.append({
@@ -0,0 +1,152 @@
+# detector/token_refresh.py
+"""
+Anti-CSRF token 刷新
+问题：爬取时抓到的 user_token / csrf 隐藏字段只在第一次提交时有效，按请求轮换 token 的应用会拒绝之后的所有探测。
+做法：
+- 学习：重新 GET 一次表单所在页面，与爬取时的隐藏字段值比较，只有值发生变化的字段才视为按请求轮换的 token；
+  固定的（每会话）CSRF token 不需要刷新，也就不会让每次探测多一个 GET。每个表单只学习一次。
+  页面无法重新获取（或 learn=False）时退回按名字判断（csrf / token / nonce ...）。
+- 刷新（两种模式）：
+  * per-probe（默认）：每次探测前 GET 一次页面拿新 token，GET + 提交在该页面的锁内完成。
+    重新 GET 页面会让页面上所有表单的 token 轮换，所以锁按页面而不是按表单：
+    并发探测同一页面上的表单时不会互相把对方的 token 作废（不同页面之间仍然并行）。
+  * bulk：一次预取 prefetch 个 token 放入队列，每次探测取一个；适用于同时存在多个有效 token 的应用。
+用法：
+    tokens = TokenManager(mode="per-probe")
+    with tokens.fresh(form, params) as values:
+        r = safe_get(form.action, params=values, ...)
+"""
+
+import re
+import threading
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from utils.http import safe_get
+from utils.metrics import metrics
+from utils.analysis import analyze, decode, response_body
+
+TOKEN_NAME_RE = re.compile(r"csrf|xsrf|token|nonce|authenticity|requestverification", re.IGNORECASE)
+MODES = ("per-probe", "bulk")
+
+
+def _form_key(form):
+    return ((form.method or "get").lower(), form.action, getattr(form, "page_url", None))
+
+
+def hidden_inputs(body, encoding, page_url, action, method):
+    """
+    {name: value} of the hidden inputs of the form posting to `action` with `method` on a fetched page,
+    or None if the page has no such form (analysis worker safe).
+    """
+    soup = BeautifulSoup(decode(body, encoding), "lxml")
+    for f in soup.find_all("form"):
+        target = f.get("action")
+        target = urljoin(page_url, target) if target else page_url
+        if target != action or f.get("method", "get").lower() != method:
+            continue
+        return {inp.get("name"): inp.get("value", "")
+                for inp in f.find_all("input", {"type": "hidden"}) if inp.get("name")}
+    return None
+
+
+class TokenManager:
+    def __init__(self, mode="per-probe", prefetch=8, timeout=10, learn=True):
+        if mode not in MODES:
+            raise ValueError(f"Unknown token refresh mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.prefetch = max(1, prefetch)
+        self.timeout = timeout
+        self.learn = learn
+        self._lock = threading.Lock()
+        self._form_locks = {}     # page URL -> Lock (serializes GET + submit in per-probe mode)
+        self._fields = {}         # form key -> frozenset of token field names
+        self._pools = {}          # form key -> deque of {field: value} (bulk mode)
+        self.fetched = 0
+
+    def _form_lock(self, form):
+        # one lock per page: fetching the page rotates the tokens of every form on it
+        key = getattr(form, "page_url", None) or _form_key(form)
+        with self._lock:
+            if key not in self._form_locks:
+                self._form_locks[key] = threading.Lock()
+            return self._form_locks[key]
+
+    def fetch(self, form):
+        """GET the page the form lives on and return the current values of its hidden inputs (or None)."""
+        page_url = getattr(form, "page_url", None)
+        if not page_url:
+            return None
+        with metrics.phase("token"):
+            r = safe_get(page_url, timeout=self.timeout)
+        if r is None:
+            return None
+        with self._lock:
+            self.fetched += 1
+        # the page parse is the main CPU cost of a probe: run it in the analysis pool when one is installed
+        return analyze(hidden_inputs, *response_body(r), page_url, form.action, (form.method or "get").lower())
+
+    def token_fields(self, form):
+        """Names of the per-request token fields of `form` (learned once per form)."""
+        key = _form_key(form)
+        if key in self._fields:
+            return self._fields[key]
+        with self._form_lock(form):
+            if key in self._fields:
+                return self._fields[key]
+            hidden = {inp["name"]: inp.get("value", "") for inp in form.inputs
+                      if inp.get("name") and (inp.get("type") or "").lower() == "hidden"}
+            # fallback when rotation can't be observed: trust the field name
+            fields = {name for name in hidden if TOKEN_NAME_RE.search(name)}
+            current = self.fetch(form) if self.learn and hidden else None
+            if current:
+                # only fields whose value changed since the crawl rotate per request
+                fields = {name for name in hidden if name in current and current[name] != hidden[name]}
+                if fields and self.mode == "bulk":
+                    self._pools.setdefault(key, deque()).append(current)
+            self._fields[key] = frozenset(fields)
+            return self._fields[key]
+
+    def _take(self, form, fields):
+        """Bulk mode: pop one prefetched token set, refilling the pool with `prefetch` GETs when empty."""
+        key = _form_key(form)
+        with self._form_lock(form):
+            pool = self._pools.setdefault(key, deque())
+            if pool:
+                metrics.cache_hit("tokens")
+            else:
+                metrics.cache_miss("tokens")
+                for _ in range(self.prefetch):
+                    current = self.fetch(form)
+                    if current and fields <= set(current):
+                        pool.append(current)
+            return pool.popleft() if pool else None
+
+    @contextmanager
+    def fresh(self, form, values):
+        """
+        Yield a copy of `values` with fresh token values filled in. In per-probe mode the form lock is held
+        for the whole block, so the request must be sent inside it.
+        """
+        fields = self.token_fields(form) if values is not None else frozenset()
+        if not fields:
+            yield values
+            return
+        if self.mode == "bulk":
+            yield self._merge(values, self._take(form, fields), fields)
+            return
+        with self._form_lock(form):
+            yield self._merge(values, self.fetch(form), fields)
+
+    @staticmethod
+    def _merge(values, current, fields):
+        merged = dict(values)
+        for name in fields:
+            if current and name in current:
+                merged[name] = current[name]
+        return merged
+
+    def stats(self):
+        return {"token_fetches": self.fetched,
+                "token_forms": sum(1 for f in self._fields.values() if f)}
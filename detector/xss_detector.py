@@ -1,27 +1,52 @@
 # detector/xss_detector.py
 from utils.http import safe_get
+from utils.analysis import analyze, decode, response_body
+from detector.token_refresh import TOKEN_NAME_RE
 from config import XSS_PAYLOADS
 
+
+def payload_reflected(body, encoding, payload):
+    """True if the payload comes back verbatim (runs in a utils.analysis worker when a pool is installed)."""
+    return payload in decode(body, encoding)
+
+
 class XSSDetector:
-    def __init__(self, timeout=10):
+    def __init__(self, timeout=10, tokens=None, max_payloads=0):
         self.timeout = timeout
+        # optional detector.token_refresh.TokenManager: refresh CSRF tokens before every probe
+        self.tokens = tokens
+        # first N payloads only (scan profile), 0 = all
+        self.payloads = list(XSS_PAYLOADS[:max_payloads] if max_payloads else XSS_PAYLOADS)
+
+    def _send(self, form, params):
+        if self.tokens is not None:
+            with self.tokens.fresh(form, params) as params:
+                return safe_get(form.action, params=params if form.method=="get" else None,
+                                data=params if form.method=="post" else None,
+                                method=form.method.upper(), timeout=self.timeout)
+        return safe_get(form.action, params=params if form.method=="get" else None,
+                        data=params if form.method=="post" else None,
+                        method=form.method.upper(), timeout=self.timeout)
 
     def test_form(self, form):
         findings = []
         base_action = form.action
         baseline_params = {inp['name']: inp.get('value', 'test') for inp in form.inputs}
+        token_fields = self.tokens.token_fields(form) if self.tokens is not None else ()
         for inp in form.inputs:
             name = inp['name']
+            # token fields are overwritten with a fresh value before sending, and a static (per-session)
+            # token must be sent unchanged: injecting into either is pointless
+            if name in token_fields or (self.tokens is not None and (inp.get("type") or "").lower() == "hidden"
+                                        and TOKEN_NAME_RE.search(name)):
+                continue
             orig = baseline_params.get(name, "")
-            for payload in XSS_PAYLOADS:
+            for payload in self.payloads:
                 test_params = baseline_params.copy()
                 test_params[name] = orig + payload
-                r = safe_get(base_action, params=test_params if form.method=="get" else None,
-                             data=test_params if form.method=="post" else None,
-                             method=form.method.upper())
+                r = self._send(form, test_params)
                 if not r: continue
-                text = r.text
-                if payload in text:
+                if analyze(payload_reflected, *response_body(r), payload):
                     findings.append({
                         "type": "XSS", "param": name, "payload": payload,
                         "evidence": "Payload reflected in response",
@@ -0,0 +1,118 @@
+# profiles.py
+"""
+扫描强度 profile：决定运行哪些检测阶段、payload 数量、超时、并发和请求预算。
+内置 quick / standard / deep，也可以用 YAML / TOML 文件自定义（可用 base 继承内置 profile）：
+
+    # weekend.toml
+    base = "deep"
+    pages = 500
+    sqli_stages = ["error", "union"]
+    max_requests = 200000
+
+用法：
+    profile = load_profile("quick")            # 或 load_profile("weekend.toml")
+    profile = profile.override(threads=8)
+    profile.to_dict()                           # 写入报告，便于复现
+"""
+
+import os
+from config import DEFAULT_TIMEOUT
+
+SQLI_STAGES = ("error", "union", "time")
+DETECTORS = ("sqli", "xss", "csrf")
+
+# standard == the scanner's historical behaviour
+STANDARD = {
+    "pages": 30,                  # crawler max pages
+    "timeout": DEFAULT_TIMEOUT,   # per-request timeout (seconds)
+    "threads": 1,                 # forms probed concurrently
+    "analysis_workers": 0,        # response parsing / matching processes (utils.analysis), 0 = inline
+    "analysis_batch": 16,         # max responses per IPC round-trip to an analysis worker
+    "delay": 0.0,                 # min seconds between requests (politeness)
+    "max_requests": 0,            # request budget per target, 0 = unlimited
+    "detectors": list(DETECTORS),
+    "query_params": True,         # probe query-string templates of crawled links
+    "sqli_stages": list(SQLI_STAGES),
+    "sqli_payloads": 0,           # first N SQLi payloads, 0 = all
+    "xss_payloads": 0,            # first N XSS payloads, 0 = all
+    "max_union_columns": 4,
+    "time_sleep": 5,              # SLEEP(n) used by time-based payloads
+    "time_threshold": 4.0,        # response slower than this counts as a time-based hit
+    "size_diff_threshold": 150,
+}
+
+PROFILES = {
+    "quick": dict(STANDARD, pages=10, timeout=5, threads=4, max_requests=2000,
+                  sqli_stages=["error"], sqli_payloads=4, xss_payloads=1, max_union_columns=0),
+    "standard": dict(STANDARD),
+    "deep": dict(STANDARD, pages=200, timeout=20, threads=4, max_union_columns=10,
+                 time_sleep=5, time_threshold=4.0, size_diff_threshold=100),
+}
+
+
+class ScanProfile:
+    def __init__(self, name, settings):
+        unknown = set(settings) - set(STANDARD)
+        if unknown:
+            raise ValueError(f"Unknown profile setting(s) in {name}: {', '.join(sorted(unknown))}")
+        merged = dict(STANDARD)
+        merged.update(settings)
+        bad_stages = set(merged["sqli_stages"]) - set(SQLI_STAGES)
+        bad_detectors = set(merged["detectors"]) - set(DETECTORS)
+        if bad_stages or bad_detectors:
+            raise ValueError(f"Invalid sqli_stages/detectors in profile {name}: "
+                             f"{', '.join(sorted(bad_stages | bad_detectors))}")
+        self.name = name
+        self.settings = merged
+
+    def __getattr__(self, key):
+        try:
+            return self.__dict__["settings"][key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def override(self, **kwargs):
+        """Copy with the given settings replaced; None values are ignored (unset CLI flags)."""
+        settings = dict(self.settings)
+        settings.update({k: v for k, v in kwargs.items() if v is not None})
+        return ScanProfile(self.name, settings)
+
+    def to_dict(self):
+        return {"name": self.name, **self.settings}
+
+
+def _read_file(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".toml":
+        try:
+            import tomllib
+        except ImportError:   # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise RuntimeError("Reading TOML profiles needs Python 3.11+ or 'pip install tomli'.")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("PyYAML is not installed. Install with 'pip install pyyaml' or use a TOML profile.")
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    raise ValueError(f"Unsupported profile file {path!r} (expected .toml, .yaml or .yml)")
+
+
+def load_profile(name_or_path="standard"):
+    """Built-in profile by name, or a custom YAML/TOML file (optionally extending `base`)."""
+    if name_or_path in PROFILES:
+        return ScanProfile(name_or_path, PROFILES[name_or_path])
+    if not os.path.exists(name_or_path):
+        raise ValueError(f"Unknown profile {name_or_path!r}: use one of {', '.join(PROFILES)} or a YAML/TOML file")
+    data = dict(_read_file(name_or_path))
+    base = data.pop("base", "standard")
+    if base not in PROFILES:
+        raise ValueError(f"Unknown base profile {base!r} in {name_or_path}")
+    settings = dict(PROFILES[base])
+    settings.update(data)
+    return ScanProfile(os.path.basename(name_or_path), settings)
@@ -0,0 +1,65 @@
+# reporter/aggregate.py
+"""
+Findings 聚合：一次遍历统计按 severity / type / URL 的分组，供 HTML/JSON/SARIF 各输出使用。
+"""
+
+SEVERITY_ORDER = ["High", "Medium", "Low", "Info"]
+
+
+def severity_rank(sev):
+    return SEVERITY_ORDER.index(sev) if sev in SEVERITY_ORDER else len(SEVERITY_ORDER)
+
+
+class FindingsAggregator:
+    def __init__(self):
+        self.total = 0
+        self.by_severity = {}
+        self.by_type = {}
+        self.by_url = {}
+        self.groups = {}      # (severity, type) -> {url: [findings]}
+
+    def add(self, f):
+        sev = f.get("severity") or "Info"
+        typ = f.get("type") or "Unknown"
+        url = f.get("url") or ""
+        self.total += 1
+        self.by_severity[sev] = self.by_severity.get(sev, 0) + 1
+        self.by_type[typ] = self.by_type.get(typ, 0) + 1
+        self.by_url[url] = self.by_url.get(url, 0) + 1
+        self.groups.setdefault((sev, typ), {}).setdefault(url, []).append(f)
+
+    def summary(self, top_urls=20):
+        return {
+            "total": self.total,
+            "by_severity": dict(sorted(self.by_severity.items(), key=lambda kv: severity_rank(kv[0]))),
+            "by_type": dict(sorted(self.by_type.items(), key=lambda kv: -kv[1])),
+            "top_urls": sorted(self.by_url.items(), key=lambda kv: -kv[1])[:top_urls],
+        }
+
+    def segments(self):
+        """
+        Yield one dict per (severity, type, url) group, ordered by severity then type then URL:
+            {"severity", "type", "url", "findings", "group_total"}
+        """
+        for (sev, typ) in sorted(self.groups, key=lambda k: (severity_rank(k[0]), k[1])):
+            urls = self.groups[(sev, typ)]
+            group_total = sum(len(v) for v in urls.values())
+            for url in sorted(urls):
+                yield {"severity": sev, "type": typ, "url": url,
+                       "findings": urls[url], "group_total": group_total}
+
+    def pages(self, page_size):
+        """Split segments into pages of roughly `page_size` findings (a segment is split if it is larger)."""
+        page, count, yielded = [], 0, False
+        for seg in self.segments():
+            items = seg["findings"]
+            while items:
+                room = page_size - count
+                chunk, items = items[:room], items[room:]
+                page.append(dict(seg, findings=chunk))
+                count += len(chunk)
+                if count >= page_size:
+                    yield page
+                    page, count, yielded = [], 0, True
+        if page or not yielded:
+            yield page
@@ -0,0 +1,46 @@
+# reporter/engine.py
+"""
+报告引擎：对 findings 只遍历一次，同时
+- 填充 FindingsAggregator（HTML 分组 / 汇总）
+- 流式写出 JSON / SARIF
+遍历结束后 HTML 根据聚合结果分页流式渲染。
+    paths = write_reports(target, pages_count, findings, "report.html", formats=("html", "json", "sarif"))
+"""
+
+import os
+from reporter.aggregate import FindingsAggregator
+from reporter.html_report import HTMLReport, DEFAULT_PAGE_SIZE
+from reporter.json_report import JSONReport
+from reporter.sarif_report import SARIFReport
+
+FORMATS = ("html", "json", "sarif")
+STREAM_WRITERS = {"json": JSONReport, "sarif": SARIFReport}
+
+
+def output_path_for(output, fmt):
+    """report.html + json -> report.json; the html path is kept as given."""
+    if fmt == "html":
+        return output
+    return os.path.splitext(output)[0] + "." + fmt
+
+
+def write_reports(target, pages_count, findings, output, formats=("html",),
+                  page_size=DEFAULT_PAGE_SIZE, extra=None):
+    """Write all requested formats; returns {format: path}."""
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown report format(s): {', '.join(sorted(unknown))}")
+    aggregator = FindingsAggregator()
+    writers = {fmt: STREAM_WRITERS[fmt](target, pages_count, output_path_for(output, fmt), extra=extra).open()
+               for fmt in formats if fmt in STREAM_WRITERS}
+    try:
+        for f in findings:
+            aggregator.add(f)
+            for w in writers.values():
+                w.write(f)
+    finally:
+        paths = {fmt: w.close(aggregator) for fmt, w in writers.items()}
+    if "html" in formats:
+        paths["html"] = HTMLReport(target, pages_count, findings, page_size=page_size,
+                                   extra=extra).generate(output, aggregator=aggregator)
+    return paths
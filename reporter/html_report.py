@@ -1,37 +1,112 @@
 # reporter/html_report.py
-from jinja2 import Template
+from functools import lru_cache
+import os
+from jinja2 import Environment
 from datetime import datetime, timezone, timedelta   # <<< MODIFIED: use timezone/timedelta for Beijing time
+from reporter.aggregate import FindingsAggregator
+
+# findings per HTML file; larger reports are split into <name>.html, <name>_p2.html, ...
+DEFAULT_PAGE_SIZE = 2000
 
 TEMPLATE = """<!doctype html>
-<html><head><meta charset="utf-8"><title>Scan Report - {{ target }}</title></head>
+<html><head><meta charset="utf-8"><title>Scan Report - {{ target }}</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; margin-bottom: 1em; }
+td, th { border: 1px solid #ccc; padding: 4px 8px; text-align: left; vertical-align: top; }
+.High { color: #b00; } .Medium { color: #c60; } .Low { color: #07a; }
+details { margin: 0 0 .5em 1em; }
+</style></head>
 <body>
 <h1>Web Scanner Report</h1>
 <p><strong>Target:</strong> {{ target }}</p>
 <p><strong>Scan time:</strong> {{ time }}</p>
+<p><strong>Pages crawled:</strong> {{ pages_count }}</p>
+{% for key, value in extra.items() %}
+{% if value is mapping %}
+<p><strong>{{ key }}:</strong></p>
+<pre>{{ value|tojson(indent=2) }}</pre>
+{% else %}
+<p><strong>{{ key }}:</strong> {{ value }}</p>
+{% endif %}
+{% endfor %}
+<h2>Summary ({{ summary.total }} findings)</h2>
+<table>
+<tr><th>Severity</th><th>Count</th></tr>
+{% for sev, n in summary.by_severity.items() %}<tr><td class="{{ sev }}">{{ sev }}</td><td>{{ n }}</td></tr>
+{% endfor %}</table>
+<table>
+<tr><th>Type</th><th>Count</th></tr>
+{% for typ, n in summary.by_type.items() %}<tr><td>{{ typ }}</td><td>{{ n }}</td></tr>
+{% endfor %}</table>
+<table>
+<tr><th>Top URLs</th><th>Count</th></tr>
+{% for url, n in summary.top_urls %}<tr><td>{{ url }}</td><td>{{ n }}</td></tr>
+{% endfor %}</table>
+{% if parts|length > 1 %}
+<p><strong>Part {{ part }} of {{ parts|length }}:</strong>
+{% for name in parts %}{% if loop.index == part %}[{{ loop.index }}]{% else %}<a href="{{ name }}">{{ loop.index }}</a>{% endif %} {% endfor %}</p>
+{% endif %}
 <h2>Findings</h2>
-{% for f in findings %}
-<div>
-  <h3>{{ f.type }} - {{ f.url }}</h3>
-  <p>Param: {{ f.param }}</p>
-  <p>Payload: {{ f.payload }}</p>
-  <p>Evidence: {{ f.evidence }}</p>
-  <p>Severity: {{ f.severity }}</p>
-</div>
+{% for seg in segments %}
+{% if loop.changed(seg.severity, seg.type) %}
+<h3 class="{{ seg.severity }}">{{ seg.severity }} - {{ seg.type }} ({{ seg.group_total }})</h3>
+{% endif %}
+<details open>
+  <summary>{{ seg.url }} ({{ seg.findings|length }})</summary>
+  <table>
+  <tr><th>Param</th><th>Payload</th><th>Evidence</th></tr>
+  {% for f in seg.findings %}<tr><td>{{ f.param }}</td><td>{{ f.payload }}</td><td>{{ f.evidence }}
+  {%- if f.template %}<br><small>applies to {{ f.affected_urls }} URLs matching {{ f.template }}</small>{% endif %}</td></tr>
+  {% endfor %}</table>
+</details>
 {% endfor %}
 </body></html>"""
 
+
+@lru_cache(maxsize=None)
+def get_template():
+    """Compile TEMPLATE once per process (autoescape: payloads must not execute in the report)."""
+    env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+    return env.from_string(TEMPLATE)
+
+
+def part_paths(output_path, count):
+    base, ext = os.path.splitext(output_path)
+    return [output_path] + [f"{base}_p{i}{ext or '.html'}" for i in range(2, count + 1)]
+
+
 class HTMLReport:
-    def __init__(self, target, pages_count, findings):
+    def __init__(self, target, pages_count, findings, page_size=DEFAULT_PAGE_SIZE, extra=None):
         self.target = target
         self.pages_count = pages_count
         self.findings = findings
+        self.page_size = page_size
+        self.extra = extra or {}
 
-    def generate(self, output_path="report.html"):
+    def generate(self, output_path="report.html", aggregator=None):
+        """
+        Render the report, streaming it to disk. Pass an already filled FindingsAggregator to
+        avoid another pass over the findings (see reporter.engine.write_reports).
+        Returns the path of the first (or only) HTML file.
+        """
+        if aggregator is None:
+            aggregator = FindingsAggregator()
+            for f in self.findings:
+                aggregator.add(f)
         # <<< MODIFIED: format time in Beijing (UTC+8)
         beijing_tz = timezone(timedelta(hours=8))
         now = datetime.now(timezone.utc).astimezone(beijing_tz).strftime("%Y-%m-%d %H:%M:%S %Z")
-        template = Template(TEMPLATE)
-        html = template.render(target=self.target, time=now, findings=self.findings)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html)
+        template = get_template()
+        summary = aggregator.summary()
+        count = max(1, -(-aggregator.total // self.page_size))
+        paths = part_paths(output_path, count)
+        names = [os.path.basename(p) for p in paths]
+        for part, segments in enumerate(aggregator.pages(self.page_size), start=1):
+            stream = template.generate(target=self.target, time=now, pages_count=self.pages_count,
+                                       extra=self.extra, summary=summary, segments=segments,
+                                       part=part, parts=names)
+            with open(paths[part - 1], "w", encoding="utf-8") as f:
+                for chunk in stream:
+                    f.write(chunk)
         return output_path
@@ -0,0 +1,42 @@
+# reporter/json_report.py
+"""
+JSON 报告（流式写出）：findings 逐条写入，结束时追加 summary，内存中不保留整份文档。
+"""
+
+import json
+from datetime import datetime, timezone
+
+
+class JSONReport:
+    def __init__(self, target, pages_count, output_path, extra=None):
+        self.target = target
+        self.pages_count = pages_count
+        self.output_path = output_path
+        self.extra = extra or {}
+        self._f = None
+        self._count = 0
+
+    def open(self):
+        self._f = open(self.output_path, "w", encoding="utf-8")
+        header = {
+            "target": self.target,
+            "generated": datetime.now(timezone.utc).isoformat(),
+            "pages_count": self.pages_count,
+        }
+        header.update(self.extra)
+        # write the header object without its closing brace, then stream the findings array
+        self._f.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "findings": [\n')
+        return self
+
+    def write(self, finding):
+        if self._count:
+            self._f.write(",\n")
+        self._f.write(json.dumps(finding, ensure_ascii=False, default=str))
+        self._count += 1
+
+    def close(self, aggregator):
+        self._f.write('\n], "summary": ')
+        self._f.write(json.dumps(aggregator.summary(), ensure_ascii=False))
+        self._f.write("}\n")
+        self._f.close()
+        return self.output_path
@@ -0,0 +1,63 @@
+# reporter/sarif_report.py
+"""
+SARIF 2.1.0 报告（流式写出），便于导入 GitHub code scanning 等工具。
+- ruleId = finding type（SQLi / XSS / CSRF ...），rules 在遍历结束后写入 tool.driver
+- severity 映射为 level：High -> error，Medium -> warning，其它 -> note
+"""
+
+import json
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+LEVELS = {"High": "error", "Medium": "warning"}
+TOOL_NAME = "WebScanner"
+TOOL_VERSION = "1.0"
+
+
+class SARIFReport:
+    def __init__(self, target, pages_count, output_path, extra=None):
+        self.target = target
+        self.pages_count = pages_count
+        self.output_path = output_path
+        self.extra = extra or {}
+        self._f = None
+        self._count = 0
+        self._rules = {}
+
+    def open(self):
+        self._f = open(self.output_path, "w", encoding="utf-8")
+        self._f.write('{"$schema": "%s", "version": "2.1.0", "runs": [{"results": [\n' % SARIF_SCHEMA)
+        return self
+
+    def write(self, finding):
+        rule = finding.get("type") or "Unknown"
+        self._rules.setdefault(rule, len(self._rules))
+        text = finding.get("evidence") or rule
+        if finding.get("param"):
+            text += f" (param: {finding['param']})"
+        result = {
+            "ruleId": rule,
+            "ruleIndex": self._rules[rule],
+            "level": LEVELS.get(finding.get("severity"), "note"),
+            "message": {"text": text},
+            "locations": [{"physicalLocation": {"artifactLocation": {"uri": finding.get("url") or self.target}}}],
+            "properties": {k: finding.get(k) for k in ("param", "payload", "severity", "template", "affected_urls")
+                           if finding.get(k) is not None},
+        }
+        if self._count:
+            self._f.write(",\n")
+        self._f.write(json.dumps(result, ensure_ascii=False, default=str))
+        self._count += 1
+
+    def close(self, aggregator):
+        rules = [{"id": r, "name": r, "shortDescription": {"text": r}}
+                 for r, _ in sorted(self._rules.items(), key=lambda kv: kv[1])]
+        tool = {"driver": {"name": TOOL_NAME, "version": TOOL_VERSION, "rules": rules}}
+        properties = {"target": self.target, "pages_count": self.pages_count, "summary": aggregator.summary()}
+        properties.update(self.extra)
+        self._f.write('\n], "tool": ')
+        self._f.write(json.dumps(tool, ensure_ascii=False))
+        self._f.write(', "properties": ')
+        self._f.write(json.dumps(properties, ensure_ascii=False, default=str))
+        self._f.write("}]}\n")
+        self._f.close()
+        return self.output_path
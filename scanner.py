@@ -1,60 +1,98 @@
 # scanner.py
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from crawler.crawler import Crawler
 from detector.sqli_detector import SQLiDetector
 from detector.xss_detector import XSSDetector
 from detector.csrf_detector import CSRFDetector
-from reporter.html_report import HTMLReport
+from detector.incremental import IncrementalStore
+from detector.token_refresh import TokenManager
+from reporter.engine import write_reports, FORMATS as REPORT_FORMATS
+from profiles import load_profile, PROFILES
 from utils import http as http_utils  
+from utils.analysis import AnalysisPool, install_pool
+from utils.metrics import metrics, ProgressReporter
+from utils.session import SessionManager, DEFAULT_EXCLUDE_PATTERNS
+from utils.logger import get_logger, setup_logging, parse_levels, FORMATS as LOG_FORMATS
 from urllib.parse import urlparse, urljoin 
 
+logger = get_logger("scanner")
+
 def parse_args():
     p = argparse.ArgumentParser()
-    p.add_argument("-u","--url",required=True)
+    p.add_argument("-u","--url")
     p.add_argument("-o","--output",default="demo_report.html")
-    p.add_argument("-p","--pages",type=int,default=30)
+    p.add_argument("-p","--pages",type=int,default=None, help="Max pages to crawl (default: from --profile)")
     p.add_argument("--username",default=None)#
     p.add_argument("--password",default=None)#
-    return p.parse_args()
+    # scan intensity: a built-in profile or a YAML/TOML file; the flags below override single settings
+    p.add_argument("--profile",default="standard", metavar="NAME|FILE",
+                   help=f"Scan profile: {'|'.join(PROFILES)} or a custom .toml/.yaml file")
+    p.add_argument("--threads",type=int,default=None, help="Number of forms probed concurrently")
+    p.add_argument("--analysis-workers",type=int,default=None,
+                   help="Processes for response parsing/matching (0 = in the I/O threads); pair with --threads")
+    p.add_argument("--timeout",type=float,default=None, help="Per-request timeout in seconds")
+    p.add_argument("--max-requests",type=int,default=None, help="Request budget per target (0 = unlimited)")
+    p.add_argument("--exclude",action="append",default=[], metavar="REGEX",
+                   help="Extra URL pattern the crawler must never follow (logout/destructive links are excluded by default)")
+    p.add_argument("--token-mode",choices=["per-probe","bulk","off"],default="per-probe",
+                   help="How CSRF tokens are refreshed before probes (bulk: prefetch --token-prefetch tokens at once)")
+    p.add_argument("--token-prefetch",type=int,default=8, help="Tokens fetched per refill in bulk token mode")
+    p.add_argument("--no-query-params",dest="query_params",action="store_const",const=False,default=None,
+                   help="Don't probe query-string parameters of crawled links")
+    p.add_argument("-f","--format",default="html", help="Comma-separated report formats: html,json,sarif")
+    p.add_argument("--page-size",type=int,default=2000, help="Findings per HTML file before the report is split")
+    # batch mode: one target per line, see batch.py for the file format
+    p.add_argument("-t","--targets",default=None, help="Targets file for batch mode (replaces -u)")
+    p.add_argument("--output-dir",default="reports", help="Batch mode: directory for per-target reports and summary.json")
+    p.add_argument("-w","--workers",type=int,default=4, help="Batch mode: number of worker processes")
+    p.add_argument("--per-host",type=int,default=1, help="Batch mode: max targets scanned concurrently on one host")
+    p.add_argument("--delay",type=float,default=None, help="Min seconds between requests from one worker (politeness)")
+    # incremental rescans: reuse findings of forms whose structure and baseline response did not change
+    p.add_argument("--incremental",action="store_true", help="Skip re-probing unchanged forms (state kept in --state)")
+    p.add_argument("--state",default="scan_state.json", help="Incremental state file (batch mode: one per target next to its report)")
+    p.add_argument("--max-age",type=float,default=168, help="Hours after which stored findings expire and forms are re-probed")
+    # instrumentation
+    p.add_argument("--metrics",default=None, help="Export scan metrics at the end (.prom = Prometheus textfile, otherwise JSON)")
+    p.add_argument("--progress",type=float,default=15, help="Seconds between live progress lines (0 disables)")
+    p.add_argument("--cprofile",default=None, metavar="DIR", help="Run under cProfile/tracemalloc and write scan.prof + tracemalloc.txt to DIR")
+    # logging (utils.logger): queue-based, so debug output doesn't slow down concurrent probes
+    p.add_argument("--log-level",default="INFO", help="Default log level (DEBUG, INFO, WARNING, ...)")
+    p.add_argument("--log-level-for",action="append",default=[], metavar="SUBSYSTEM=LEVEL",
+                   help="Per-subsystem level, e.g. crawler=DEBUG or detector.sqli=DEBUG (repeatable)")
+    p.add_argument("--log-format",choices=LOG_FORMATS,default="text", help="text or one JSON object per line")
+    p.add_argument("--log-sample",type=float,default=1.0,
+                   help="Fraction of per-request debug events kept (e.g. 0.01)")
+    p.add_argument("--log-file",default=None, help="Write logs to this file instead of stdout")
+    args = p.parse_args()
+    args.formats = tuple(x.strip().lower() for x in args.format.split(",") if x.strip())
+    if not args.formats or set(args.formats) - set(REPORT_FORMATS):
+        p.error(f"--format must be a comma-separated subset of {','.join(REPORT_FORMATS)}")
+    if not args.url and not args.targets:
+        p.error("one of -u/--url or -t/--targets is required")
+    if args.page_size < 1:
+        p.error("--page-size must be at least 1")
+    if not 0 <= args.log_sample <= 1:
+        p.error("--log-sample must be between 0 and 1")
+    try:
+        args.log_levels = parse_levels(args.log_level_for)
+    except ValueError as e:
+        p.error(str(e))
+    try:
+        args.scan_profile = load_profile(args.profile).override(
+            pages=args.pages, threads=args.threads, analysis_workers=args.analysis_workers,
+            timeout=args.timeout, delay=args.delay,
+            max_requests=args.max_requests, query_params=args.query_params)
+    except (ValueError, RuntimeError, OSError) as e:
+        p.error(str(e))
+    return args
 
 def make_login_url(base_target_url):
     parsed = urlparse(base_target_url)
     base = f"{parsed.scheme}://{parsed.netloc}"
     return urljoin(base, "login.php")
 
-def main():
-    args = parse_args()
-
-    login_data = None
-    login_url = None
-    if args.username and args.password:
-        # <<< MODIFIED: compute login_url from target so host/port match
-        login_url = make_login_url(args.url)
-        login_data = {"username": args.username, "password": args.password, "Login": "Login"}
-        print(f"[i] Using login URL: {login_url}")
-
-    # create crawler with optional login
-    crawler = Crawler(args.url, max_pages=args.pages, login_url=login_url, login_data=login_data)
-
-    # <<< ADDED: sync cookies from crawler.session to utils.http.session
-    # Reason: detectors use utils.http.session (safe_get). Ensure they share login cookies.
-    try:
-        # get_dict gives cookie key->value; update the global session's cookies
-        http_utils.session.cookies.update(crawler.session.cookies.get_dict())
-        print("[i] Synced crawler session cookies to utils.http.session")
-    except Exception as e:
-        print(f"[!] Failed to sync cookies: {e}")
-        
-    pages = crawler.crawl()
-    sqli = SQLiDetector()
-    xss = XSSDetector()
-    csrf = CSRFDetector()
-    findings = []
-    for page in pages:
-        for form in page.forms:
-            findings.extend(sqli.test_form(form))
-            findings.extend(xss.test_form(form))
-            findings.extend(csrf.test_form(form))
+def dedupe_findings(findings):
     unique = []
     seen = set()
     for f in findings:
@@ -64,11 +102,212 @@ def main():
             continue
         seen.add(key)
         unique.append(f)
-    findings = unique
+    return unique
+
+def scan_form(form, sqli, xss, csrf):
+    """Run every enabled detector (None = disabled by the profile) on one form, attributing requests in the metrics."""
+    findings = []
+    with metrics.phase("payload"):
+        if sqli is not None:
+            with metrics.detector("sqli"):
+                findings.extend(sqli.test_form(form))
+        if xss is not None:
+            with metrics.detector("xss"):
+                findings.extend(xss.test_form(form))
+        # links aren't forms: a CSRF verdict on a query-string template would be noise
+        if csrf is not None and getattr(form, "source", "form") != "query":
+            with metrics.detector("csrf"):
+                findings.extend(csrf.test_form(form))
+    # a query-string injection point stands for every URL of its template
+    template_urls = getattr(form, "template_urls", None)
+    if template_urls:
+        for f in findings:
+            f["template"] = form.template
+            f["affected_urls"] = len(template_urls)
+    return findings
+
+def scan_target(url, output, username=None, password=None, state=None, max_age=168,
+                formats=("html",), page_size=2000, exclude=None,
+                token_mode="per-probe", token_prefetch=8, profile=None, pages=None):
+    """
+    Crawl + detect + report for a single target.
+    profile: profiles.ScanProfile (pages, threads, timeouts, detector stages, request budget...), default "standard";
+        pages overrides profile.pages (per-target value in batch mode).
+    state: incremental state file path (None disables incremental mode); max_age in hours.
+    exclude: extra link patterns the crawler must skip.
+    token_mode: "per-probe" / "bulk" CSRF token refresh (see detector.token_refresh), "off" to disable.
+    Returns (pages_count, findings, stats); reports are written next to `output` (see reporter.engine).
+    """
+    profile = (profile or load_profile("standard")).override(pages=pages)
+    http_utils.set_request_delay(profile.delay)
+    http_utils.set_request_budget(profile.max_requests)
+    logger.info("Scan profile: %s", profile.name)
+
+    login_data = None
+    login_url = None
+    if username and password:
+        # <<< MODIFIED: compute login_url from target so host/port match
+        login_url = make_login_url(url)
+        login_data = {"username": username, "password": password, "Login": "Login"}
+        logger.info("Using login URL: %s", login_url)
+
+    # <<< MODIFIED: crawler and detectors share utils.http.session through one SessionManager,
+    # so a re-login (after the session dies mid-scan) is visible to everyone.
+    manager = SessionManager(http_utils.session, url.rstrip('/'), login_url, login_data,
+                             exclude_patterns=DEFAULT_EXCLUDE_PATTERNS + list(exclude or []),
+                             timeout=profile.timeout)
+    http_utils.install_session_manager(manager)
+
+    # CPU side of the scan (decode / parse / match) in worker processes, see utils.analysis
+    analysis_pool = AnalysisPool(profile.analysis_workers, profile.analysis_batch) if profile.analysis_workers > 0 else None
+    install_pool(analysis_pool)
+    try:
+        # create crawler with optional login
+        crawler = Crawler(url, max_pages=profile.pages, login_url=login_url, login_data=login_data,
+                          session_manager=manager, timeout=profile.timeout)
+        crawled = crawler.crawl()
+        tokens = TokenManager(mode=token_mode, prefetch=token_prefetch, timeout=profile.timeout) if token_mode != "off" else None
+        sqli = xss = csrf = None
+        if "sqli" in profile.detectors:
+            sqli = SQLiDetector(timeout=profile.timeout, tokens=tokens, stages=profile.sqli_stages,
+                                max_payloads=profile.sqli_payloads, max_union_columns=profile.max_union_columns,
+                                time_sleep=profile.time_sleep, time_threshold=profile.time_threshold,
+                                size_diff_threshold=profile.size_diff_threshold)
+        if "xss" in profile.detectors:
+            xss = XSSDetector(timeout=profile.timeout, tokens=tokens, max_payloads=profile.xss_payloads)
+        if "csrf" in profile.detectors:
+            csrf = CSRFDetector()
+        store = IncrementalStore(state, max_age=max_age * 3600, timeout=profile.timeout, tokens=tokens) if state else None
+
+        def check_form(form):
+            if store is None:
+                return scan_form(form, sqli, xss, csrf)
+            before = http_utils.request_count()
+            refused = http_utils.refused_count()
+
+            def complete():
+                # with the request budget spent, neither trust nor store results for this form
+                return not http_utils.budget_exhausted() and http_utils.refused_count() == refused
+
+            base = store.baseline(form)
+            cached = store.lookup(form, base) if complete() else None
+            if cached is not None:
+                return cached
+            form_findings = scan_form(form, sqli, xss, csrf)
+            # findings of a partially probed form would be reused as if complete on the next run
+            if complete():
+                store.record(form, base, form_findings, http_utils.request_count() - before)
+            return form_findings
+
+        forms = [form for page in crawled for form in page.forms]
+        if profile.query_params:
+            points = crawler.injection_points()
+            covered = sum(len(p.template_urls) for p in points)
+            logger.info("%d query-string templates cover %d URLs", len(points), covered)
+            forms.extend(points)
+        findings = []
+        if profile.threads > 1:
+            with ThreadPoolExecutor(max_workers=profile.threads) as pool:
+                for form_findings in pool.map(check_form, forms):
+                    findings.extend(form_findings)
+        else:
+            for form in forms:
+                findings.extend(check_form(form))
+    finally:
+        install_pool(None)
+        if analysis_pool is not None:
+            analysis_pool.close()
+    findings = dedupe_findings(findings)
+
+    stats = dict(manager.stats())
+    stats["budget_exhausted"] = http_utils.budget_exhausted()
+    if stats["budget_exhausted"]:
+        logger.warning("Request budget of %d exhausted: results are partial", profile.max_requests)
+    stats.update({f"crawl_{k}": v for k, v in crawler.stats.items()})
+    if tokens is not None:
+        stats.update(tokens.stats())
+    if analysis_pool is not None:
+        stats.update(analysis_pool.stats())
+    if manager.relogins:
+        logger.info("Session: %d re-logins, %d requests replayed", manager.relogins, manager.replayed)
+    if store is not None:
+        store.save()
+        stats.update(store.stats())
+        logger.info("Incremental: reused %d forms, re-probed %d, saved %d requests",
+                    stats["reused_forms"], stats["rescanned_forms"], stats["saved_requests"])
             
-    report = HTMLReport(args.url, len(pages), findings)
-    out = report.generate(args.output)
-    print(f"Report saved to {out} with {len(findings)} findings.")
+    # record the effective settings so the throughput / coverage trade-off of this run is reproducible
+    extra = {"scan_profile": profile.to_dict(), "budget_exhausted": stats["budget_exhausted"]}
+    write_reports(url, len(crawled), findings, output, formats=formats, page_size=page_size, extra=extra)
+    return len(crawled), findings, stats
+
+def scan_options(args):
+    """scan_target keyword arguments shared by single-target and batch mode."""
+    return {"max_age": args.max_age, "formats": args.formats, "page_size": args.page_size,
+            "exclude": args.exclude, "token_mode": args.token_mode, "token_prefetch": args.token_prefetch,
+            "profile": args.scan_profile}
+
+def run_profiled(func, out_dir):
+    """Run func() under cProfile + tracemalloc, writing scan.prof and tracemalloc.txt into out_dir."""
+    import cProfile
+    import os
+    import pstats
+    import tracemalloc
+    os.makedirs(out_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    tracemalloc.start(25)
+    try:
+        return profiler.runcall(func)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        prof_path = os.path.join(out_dir, "scan.prof")
+        profiler.dump_stats(prof_path)
+        mem_path = os.path.join(out_dir, "tracemalloc.txt")
+        with open(mem_path, "w", encoding="utf-8") as f:
+            f.write(f"current={current} bytes peak={peak} bytes\n\n")
+            for stat in snapshot.statistics("lineno")[:50]:
+                f.write(f"{stat}\n")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        logger.info("Profile written to %s, memory stats to %s (peak %.1f MiB)", prof_path, mem_path, peak / 1024 / 1024)
+
+def main():
+    args = parse_args()
+    setup_logging(level=args.log_level, fmt=args.log_format, levels=args.log_levels,
+                  sample=args.log_sample, path=args.log_file)
+    if args.cprofile:
+        return run_profiled(lambda: run(args), args.cprofile)
+    return run(args)
+
+def run(args):
+    if args.targets:
+        from batch import load_targets, run_batch
+        targets = load_targets(args.targets, default_pages=args.pages,
+                               default_username=args.username, default_password=args.password)
+        summary = run_batch(targets, args.output_dir, workers=args.workers,
+                            per_host=args.per_host, incremental=args.incremental,
+                            scan_options=scan_options(args))
+        logger.info("Batch done: %d targets, %d failed, %d findings. Summary saved to %s.",
+                    summary["targets"], summary["failed"], summary["findings"], summary["path"])
+        return
+
+    metrics.reset()
+    progress = ProgressReporter(metrics, args.progress) if args.progress > 0 else None
+    if progress:
+        progress.start()
+    try:
+        pages_count, findings, stats = scan_target(args.url, args.output,
+                                                   username=args.username, password=args.password,
+                                                   state=args.state if args.incremental else None,
+                                                   **scan_options(args))
+    finally:
+        if progress:
+            progress.stop()
+    logger.info(metrics.progress_line())
+    if args.metrics:
+        logger.info("Metrics exported to %s", metrics.export(args.metrics))
+    logger.info("Report saved to %s with %d findings.", args.output, len(findings))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,68 @@
+# tests/test_analysis.py
+import pytest
+from utils import analysis
+from utils.analysis import AnalysisPool
+from crawler.crawler import parse_page
+from detector.sqli_detector import match_response
+from benchmarks.run_benchmarks import synthetic_page, run_scaling
+
+
+def _fail(body):
+    raise ValueError(body)
+
+
+def test_pool_matches_inline_results():
+    body = synthetic_page(1, forms=3, links=5)
+    inline = parse_page(body, "utf-8", "http://example.com/")
+    pool = AnalysisPool(workers=2, batch_size=4)
+    try:
+        futures = [pool.submit(parse_page, body, "utf-8", "http://example.com/") for _ in range(10)]
+        results = [f.result(timeout=30) for f in futures]
+        error = pool.submit(match_response, b"You have an error in your SQL syntax", None, "zzz").result(timeout=30)
+        with pytest.raises(ValueError):
+            pool.submit(_fail, "boom").result(timeout=30)
+    finally:
+        pool.close()
+    assert all(r["forms"] == inline["forms"] and r["links"] == inline["links"] for r in results)
+    assert len(inline["forms"]) == 3 and len(inline["links"]) == 5
+    assert error == (True, False, len("You have an error in your SQL syntax"))
+    assert pool.tasks == 12 and pool.batches <= pool.tasks
+
+
+def test_inline_when_no_pool():
+    assert analysis.analyze(match_response, "normal page", None, "page") == (False, True, 11)
+    fut = analysis.submit(_fail, "boom")
+    assert isinstance(fut.exception(), ValueError)
+
+
+def test_run_scaling_reports_speedup():
+    results = run_scaling([0, 1], pages=4, io_threads=2)
+    assert [r["analysis_workers"] for r in results] == [0, 1]
+    assert results[0]["speedup"] == 1.0 and results[1]["forms"] == results[0]["forms"] == 4 * 40
+
+
+def test_token_refresh_and_baseline_run_in_pool():
+    from benchmarks.mock_app import start_mock_app
+    from crawler.crawler import Crawler
+    from detector.incremental import IncrementalStore
+    from detector.token_refresh import TokenManager
+    from detector.xss_detector import XSSDetector
+    server, url = start_mock_app(pages=1, forms_per_page=1, params_per_form=1, csrf_tokens=True)
+    pool = AnalysisPool(workers=1)
+    submitted = []
+    submit = pool.submit
+    pool.submit = lambda func, *args: submitted.append(func.__name__) or submit(func, *args)
+    try:
+        form = [f for p in Crawler(url, max_pages=3).crawl() for f in p.forms][0]
+        analysis.install_pool(pool)
+        tokens = TokenManager()
+        assert XSSDetector(tokens=tokens).test_form(form)
+        assert IncrementalStore(None, tokens=tokens).baseline(form)
+        # every token GET + the baseline were parsed / hashed in the worker, not on this thread
+        assert submitted.count("hidden_inputs") == tokens.fetched > 1
+        assert submitted.count("baseline_digest") == 1
+    finally:
+        analysis.install_pool(None)
+        pool.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,72 @@
+# tests/test_batch.py
+import os
+import pytest
+import batch
+from batch import parse_target_line, group_by_host, report_name, assign_report_names, aggregate, run_batch
+from benchmarks.mock_app import start_mock_app
+from profiles import load_profile
+
+def test_parse_target_line():
+    assert parse_target_line("   ") is None
+    assert parse_target_line("# comment") is None
+    t = parse_target_line("http://h1:8080/ username=admin password=pw pages=5", default_pages=30)
+    assert t["url"] == "http://h1:8080/"
+    assert t["username"] == "admin" and t["password"] == "pw"
+    assert t["pages"] == 5
+    t = parse_target_line("http://h2/", default_pages=7, default_username="u", default_password="p")
+    assert t["pages"] == 7 and t["username"] == "u"
+    with pytest.raises(ValueError):
+        parse_target_line("http://h3/ bogus=1")
+
+def test_group_by_host_keeps_order():
+    targets = [{"url": u} for u in ("http://a/1", "http://b/1", "http://a/2")]
+    queues = group_by_host(targets)
+    assert list(queues) == ["a", "b"]
+    assert [t["url"] for t in queues["a"]] == ["http://a/1", "http://a/2"]
+
+def test_report_names_are_unique_and_order_independent():
+    urls = ["http://h/app", "https://h/app", "http://h/app?x=1", "http://h/app?x=2", "http://h/other"]
+    names = {t["url"]: t["output"] for t in assign_report_names([{"url": u} for u in urls])}
+    assert len(set(names.values())) == len(urls)
+    assert names["http://h/other"] == "h_other.html"
+    assert names["https://h/app"].startswith("https_h_app_") and names["http://h/app"].startswith("http_h_app_")
+    # reordering the targets file must not swap reports (and .state.json files) between targets
+    reordered = {t["url"]: t["output"] for t in assign_report_names([{"url": u} for u in reversed(urls)])}
+    assert reordered == names
+    explicit = assign_report_names([{"url": "http://a/", "output": "r.html"}, {"url": "http://b/", "output": "r.html"},
+                                    {"url": "http://c/", "output": "c.html"}, {"url": "http://c/"}])
+    outputs = [t["output"] for t in explicit]
+    assert len(set(outputs)) == 4 and "r.html" not in outputs and outputs[2] == "c.html"
+
+def test_report_name_and_aggregate():
+    assert report_name("http://10.0.0.5:8080/dvwa/") == "10.0.0.5_8080_dvwa.html"
+    summary = aggregate([
+        {"url": "http://a/", "pages": 3, "findings": 2, "by_severity": {"High": 2}, "by_type": {"SQLi": 2}, "error": None},
+        {"url": "http://b/", "pages": 0, "findings": 0, "by_severity": {}, "by_type": {}, "error": "boom"},
+    ])
+    assert summary["targets"] == 2 and summary["failed"] == 1
+    assert summary["findings"] == 2 and summary["by_severity"] == {"High": 2}
+
+def test_run_batch_round_robin_with_per_host_limit(tmp_path, monkeypatch):
+    servers = [start_mock_app(pages=2, forms_per_page=1, params_per_form=1, latency=0.005) for _ in range(2)]
+    events = []
+    monkeypatch.setattr(batch.logger, "info", lambda msg, *args: events.append((msg % args).split()[:2]))
+    try:
+        (_, a), (_, b) = servers
+        targets = [{"url": u, "pages": 2} for u in (a, a + "page/0", a + "page/1", b, b + "page/0")]
+        summary = run_batch(targets, str(tmp_path), workers=4, per_host=2,
+                            scan_options={"profile": load_profile("quick")})
+    finally:
+        for server, _ in servers:
+            server.shutdown()
+            server.server_close()
+    assert summary["targets"] == 5 and summary["failed"] == 0
+    assert len({r["report"] for r in summary["results"]}) == 5 and all(os.path.exists(r["report"]) for r in summary["results"])
+    started = [url for kind, url in events if kind == "started"]
+    assert started[:3] == [a, b, a + "page/0"]            # hosts are served in turn, not in file order
+    running, peak = {a: 0, b: 0}, {a: 0, b: 0}
+    for kind, url in events:
+        host = a if url.startswith(a) else b
+        running[host] += 1 if kind == "started" else -1
+        peak[host] = max(peak[host], running[host])
+    assert peak == {a: 2, b: 2}                           # --per-host 2 holds back a's third target
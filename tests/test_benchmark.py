@@ -0,0 +1,39 @@
+# tests/test_benchmark.py
+import pytest
+from benchmarks.mock_app import start_mock_app
+from benchmarks.run_benchmarks import compare, median_result
+from crawler.crawler import Crawler
+from detector.sqli_detector import SQLiDetector
+
+@pytest.fixture
+def mock_app():
+    server, url = start_mock_app(pages=3, forms_per_page=2, params_per_form=1)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+def test_crawl_and_detect_on_mock_app(mock_app):
+    pages = Crawler(mock_app, max_pages=10).crawl()
+    forms = [f for p in pages for f in p.forms]
+    assert len(pages) >= 4          # index + 3 form pages
+    assert len(forms) == 6
+    assert {f.method for f in forms} == {"get", "post"}
+    findings = SQLiDetector().test_form(forms[0])
+    assert any(f["type"] == "SQLi" for f in findings)
+
+def test_compare_flags_regressions():
+    baseline = {"results": [{"scenario": "small", "crawl": {"pages_per_sec": 100.0}, "total_wall": 1.0}]}
+    current = {"results": [{"scenario": "small", "crawl": {"pages_per_sec": 50.0}, "total_wall": 1.1}]}
+    regressions = compare(current, baseline, tolerance=0.25)
+    assert len(regressions) == 1 and "pages_per_sec" in regressions[0]
+
+def test_median_of_repeated_runs():
+    runs = [{"scenario": "small", "crawl": {"pages": 11, "wall": w}, "total_wall": w * 2, "per_finding": None}
+            for w in (0.1, 0.5, 0.12)]
+    merged = median_result(runs)
+    assert merged == {"scenario": "small", "crawl": {"pages": 11, "wall": 0.12}, "total_wall": 0.24, "per_finding": None}
+
+def test_compare_skips_baseline_with_other_options():
+    baseline = {"results": [{"scenario": "small", "options": {"pages": 10}, "total_wall": 1.0}]}
+    current = {"results": [{"scenario": "small", "options": {"pages": 40}, "total_wall": 4.0}]}
+    assert compare(current, baseline) == []
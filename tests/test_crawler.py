@@ -47,3 +47,66 @@ def test_crawl_basic(monkeypatch):
     # ensure pages are Page instances and contain html
     assert all(isinstance(p, Page) for p in pages)
     assert any("login" in p.html for p in pages)
+
+def test_crawl_skips_binary_and_counts_compression():
+    from benchmarks.mock_app import start_mock_app
+    server, url = start_mock_app(pages=2, forms_per_page=1, binary_files=2, compress=True)
+    try:
+        c = Crawler(url, max_pages=20)
+        pages = c.crawl()
+        assert not any("/files/" in p.url or "/download/" in p.url for p in pages)
+        assert c.stats["skipped_extension"] == 2         # /files/<k>.pdf never requested
+        assert c.stats["skipped_content_type"] == 2      # /download/<k> aborted after the headers
+        assert c.stats["bytes_skipped"] > 0
+        assert c.stats["bytes_decoded"] > c.stats["bytes_wire"] > 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_query_string_templates():
+    from benchmarks.mock_app import start_mock_app
+    from crawler.crawler import QueryForm
+    from detector.sqli_detector import SQLiDetector
+    server, url = start_mock_app(pages=3, forms_per_page=1, query_links=3)
+    try:
+        c = Crawler(url, max_pages=6)
+        c.crawl()
+        points = c.injection_points()
+        # /item.php?id=..&cat=.. links from every page collapse into a single template
+        assert len(points) == 1
+        point = points[0]
+        assert isinstance(point, QueryForm) and point.method == "get"
+        assert point.action.endswith("/item.php")
+        assert {i["name"] for i in point.inputs} == {"id", "cat"}
+        assert len(point.template_urls) == 9
+        assert any(f["type"] == "SQLi" for f in SQLiDetector().test_form(point))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_unlabeled_large_body_is_aborted(monkeypatch):
+    monkeypatch.setattr("crawler.crawler.MAX_PAGE_BYTES", 1000)
+
+    class ChunkedResp:
+        headers = {"Content-Type": "text/html"}     # no Content-Length
+        encoding = "utf-8"
+
+        def __init__(self, size):
+            self.size = size
+            self.read = 0
+            self.closed = False
+
+        def iter_content(self, chunk_size):
+            while self.read < self.size:
+                self.read += 100
+                yield b"x" * 100
+
+        def close(self):
+            self.closed = True
+
+    c = Crawler("http://example.com")
+    big = ChunkedResp(10 ** 6)
+    assert c._read_body(big, "http://example.com/huge") is None
+    assert big.closed and big.read <= 1100
+    assert c.stats["skipped_too_large"] == 1
+    assert c._read_body(ChunkedResp(500), "http://example.com/small") == (b"x" * 500, "utf-8")
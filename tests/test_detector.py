@@ -73,3 +73,24 @@ def test_csrf_detector():
         inputs = [{"name":"amount","type":"text","value":"1"}]
     res_bad = c.test_form(F_bad)
     assert any(r['severity'] == "Medium" for r in res_bad)
+
+def test_time_based_uses_server_response_time(monkeypatch):
+    import time
+    from datetime import timedelta
+    server_time = {"value": 0.01}
+
+    def fake_safe_get(url, params=None, data=None, method="GET", **kwargs):
+        time.sleep(0.3)                  # throttle / token lock wait before the request is sent
+        r = DummyResp("normal")
+        r.elapsed = timedelta(seconds=server_time["value"])
+        return r
+    monkeypatch.setattr("detector.sqli_detector.safe_get", fake_safe_get)
+
+    class F:
+        action = "http://example.com/search"
+        method = "get"
+        inputs = [{"name": "q", "type": "text", "value": ""}]
+    s = SQLiDetector(stages=("time",), time_threshold=0.2)
+    assert s.test_form(F) == []
+    server_time["value"] = 5.0
+    assert any(f["type"] == "SQLi (time-based)" for f in s.test_form(F))
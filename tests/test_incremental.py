@@ -0,0 +1,101 @@
+# tests/test_incremental.py
+import pytest
+from detector.incremental import IncrementalStore, form_fingerprint, baseline_digest
+
+class DummyResp:
+    def __init__(self, text):
+        self.text = text
+        self.status_code = 200
+
+class F:
+    action = "http://example.com/search"
+    method = "get"
+    inputs = [{"name": "q", "type": "text", "value": ""},
+              {"name": "user_token", "type": "hidden", "value": "t1"}]
+
+def test_unchanged_form_is_reused(tmp_path, monkeypatch):
+    page = {"text": '<form><input type="hidden" name="user_token" value="aaa"></form>ok'}
+    monkeypatch.setattr("detector.incremental.safe_get", lambda *a, **k: DummyResp(page["text"]))
+    path = str(tmp_path / "state.json")
+    finding = {"type": "SQLi", "param": "q", "payload": "'", "url": F.action, "severity": "High"}
+
+    store = IncrementalStore(path)
+    base = store.baseline(F)
+    assert store.lookup(F, base) is None
+    store.record(F, base, [finding], requests_used=20)
+    store.save()
+
+    # rotated hidden token must not invalidate the baseline
+    page["text"] = '<form><input type="hidden" name="user_token" value="bbb"></form>ok'
+    store = IncrementalStore(path)
+    assert store.lookup(F, store.baseline(F)) == [finding]
+    assert store.stats()["saved_requests"] == 19
+
+    # changed page content forces a re-probe
+    page["text"] = "different"
+    assert store.lookup(F, store.baseline(F)) is None
+
+def test_expired_entry_is_reprobed(tmp_path):
+    store = IncrementalStore(str(tmp_path / "s.json"), max_age=1)
+    store.record(F, "x", [], requests_used=5)
+    store.forms[form_fingerprint(F)]["scanned_at"] -= 10
+    assert store.lookup(F, "x") is None
+
+def test_failed_baseline_is_a_cache_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr("detector.incremental.safe_get", lambda *a, **k: None)
+    store = IncrementalStore(str(tmp_path / "s.json"))
+    base = store.baseline(F)
+    assert base is None
+    store.record(F, base, [], requests_used=5)
+    assert store.forms == {}
+    store.record(F, "ok", [], requests_used=5)
+    assert store.lookup(F, base) is None and store.lookup(F, "") is None
+
+def test_budget_cut_forms_are_not_recorded(tmp_path):
+    from benchmarks.mock_app import start_mock_app
+    from scanner import scan_target
+    from profiles import load_profile
+    from utils import http as http_utils
+    server, url = start_mock_app(pages=3, forms_per_page=1, params_per_form=1)
+    try:
+        state = str(tmp_path / "state.json")
+        profile = load_profile("standard").override(sqli_stages=["error"])
+        _, fresh, _ = scan_target(url, str(tmp_path / "fresh.html"), profile=profile)
+        _, partial, stats = scan_target(url, str(tmp_path / "cut.html"), state=state,
+                                        profile=profile.override(max_requests=12))
+        assert stats["budget_exhausted"] and len(partial) < len(fresh)
+        _, rescanned, stats = scan_target(url, str(tmp_path / "full.html"), state=state, profile=profile)
+        assert len(rescanned) == len(fresh)
+    finally:
+        http_utils.set_request_budget(0)
+        http_utils.install_session_manager(None)
+        server.shutdown()
+        server.server_close()
+
+def test_baseline_uses_fresh_csrf_tokens(tmp_path):
+    from benchmarks.mock_app import start_mock_app
+    from crawler.crawler import Crawler
+    from detector.token_refresh import TokenManager
+    from scanner import scan_target
+    from utils import http as http_utils
+    server, url = start_mock_app(pages=2, forms_per_page=2, params_per_form=1, csrf_tokens=True)
+    try:
+        form = [f for p in Crawler(url, max_pages=5).crawl() for f in p.forms][1]
+        IncrementalStore(None).baseline(form)            # the crawl-time token is single-use
+        rejected = IncrementalStore(None).baseline(form)
+        assert rejected == baseline_digest(b"<!doctype html><html><head><title>error</title></head>"
+                                           b"<body>CSRF token is incorrect</body></html>", "utf-8")
+        tokens = TokenManager()
+        fresh = IncrementalStore(None, tokens=tokens).baseline(form)
+        assert fresh and fresh != rejected
+        assert IncrementalStore(None, tokens=tokens).baseline(form) == fresh
+
+        state = str(tmp_path / "state.json")
+        _, first, _ = scan_target(url, str(tmp_path / "a.html"), state=state)
+        _, second, stats = scan_target(url, str(tmp_path / "b.html"), state=state)
+        assert first and len(second) == len(first)
+        assert stats["reused_forms"] == 4 and stats["rescanned_forms"] == 0
+    finally:
+        http_utils.install_session_manager(None)
+        server.shutdown()
+        server.server_close()
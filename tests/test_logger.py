@@ -0,0 +1,47 @@
+# tests/test_logger.py
+import json
+from utils.logger import get_logger, setup_logging, shutdown_logging, parse_levels, SAMPLED
+
+
+def test_json_levels_and_sampling(tmp_path):
+    path = tmp_path / "scan.log"
+    setup_logging(level="INFO", fmt="json", levels={"crawler": "DEBUG"}, sample=0.25, path=str(path))
+    try:
+        crawler_log = get_logger("crawler")
+        detector_log = get_logger("detector.sqli")
+        for i in range(8):
+            crawler_log.debug("Fetched %s", f"http://example.com/{i}", extra=SAMPLED)
+        crawler_log.info("Crawl transfer", extra={"pages": 8})
+        detector_log.debug("probe")                  # below the default INFO level: dropped
+        detector_log.warning("timeout")
+    finally:
+        shutdown_logging()
+        setup_logging()
+    entries = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    fetched = [e for e in entries if e["msg"].startswith("Fetched")]
+    assert [e["msg"] for e in fetched] == ["Fetched http://example.com/0", "Fetched http://example.com/4"]
+    assert {"logger": "crawler", "level": "INFO", "pages": 8}.items() <= entries[-2].items()
+    assert entries[-1]["logger"] == "detector.sqli" and entries[-1]["level"] == "WARNING"
+    assert "sample" not in fetched[0]
+
+
+def test_parse_levels():
+    assert parse_levels(["crawler=debug", "detector = WARNING"]) == {"crawler": "DEBUG", "detector": "WARNING"}
+    for bad in (["crawler"], ["crawler=LOUD"]):
+        try:
+            parse_levels(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad} should be rejected")
+
+
+def test_import_starts_no_thread():
+    import os
+    import subprocess
+    import sys
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("import threading, scanner; n = threading.active_count(); "
+            "scanner.logger.warning('x'); print('threads', n, threading.active_count())")
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    counts = [line.split()[1:] for line in out.stdout.splitlines() if line.startswith("threads ")]
+    assert counts == [["1", "2"]]                     # listener starts with the first record
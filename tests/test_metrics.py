@@ -0,0 +1,39 @@
+# tests/test_metrics.py
+import json
+import pytest
+from utils.metrics import Metrics, Histogram
+
+def test_histogram_quantiles():
+    h = Histogram(buckets=(0.1, 1.0))
+    for v in (0.05, 0.05, 0.5, 3.0):
+        h.observe(v)
+    assert h.count == 4
+    assert h.quantile(0.5) == 0.1
+    assert h.quantile(1.0) == 3.0
+
+def test_phase_and_detector_attribution(tmp_path):
+    m = Metrics()
+    with m.detector("sqli"), m.phase("payload"):
+        with m.request():
+            pass
+        with m.phase("time-based"):
+            with m.request():
+                pass
+    with m.request():
+        pass
+    m.cache_hit("incremental")
+    m.cache_miss("incremental")
+    s = m.snapshot()
+    assert s["latency"]["payload"]["count"] == 1
+    assert s["latency"]["time-based"]["count"] == 1
+    assert s["latency"]["other"]["count"] == 1
+    assert s["detector_requests"] == {"sqli": 2}
+    assert s["cache"]["incremental"]["hit_rate"] == 0.5
+    assert s["max_in_flight"] == 1 and s["in_flight"] == 0
+
+    prom = m.to_prometheus()
+    assert 'webscanner_request_duration_seconds_count{phase="payload"} 1' in prom
+    assert 'webscanner_detector_requests_total{detector="sqli"} 2' in prom
+
+    out = m.export(str(tmp_path / "m.json"))
+    assert json.load(open(out))["requests"] == 3
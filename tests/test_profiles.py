@@ -0,0 +1,67 @@
+# tests/test_profiles.py
+import pytest
+from profiles import load_profile, PROFILES, STANDARD
+from detector.sqli_detector import SQLiDetector
+from utils import http as http_utils
+
+
+class DummyResp:
+    def __init__(self, text):
+        self.text = text
+        self.status_code = 200
+
+
+def test_builtin_profiles_and_override():
+    assert set(PROFILES) == {"quick", "standard", "deep"}
+    standard = load_profile("standard")
+    assert standard.pages == STANDARD["pages"]
+    quick = load_profile("quick").override(threads=8, pages=None)
+    assert quick.threads == 8
+    assert quick.pages == PROFILES["quick"]["pages"]      # None = keep the profile value
+    assert quick.to_dict()["name"] == "quick"
+    with pytest.raises(ValueError):
+        load_profile("turbo")
+    with pytest.raises(ValueError):
+        load_profile("standard").override(sqli_stages=["boolean"])
+
+
+def test_toml_profile_with_base(tmp_path):
+    path = tmp_path / "weekend.toml"
+    path.write_text('base = "deep"\npages = 500\nsqli_stages = ["error", "union"]\n')
+    profile = load_profile(str(path))
+    assert profile.pages == 500
+    assert profile.sqli_stages == ["error", "union"]
+    assert profile.max_union_columns == PROFILES["deep"]["max_union_columns"]
+    bad = tmp_path / "bad.toml"
+    bad.write_text("colour = 'red'\n")
+    with pytest.raises(ValueError):
+        load_profile(str(bad))
+
+
+def test_sqli_stages_and_payload_cap(monkeypatch):
+    sent = []
+
+    def fake_safe_get(url, params=None, data=None, method="GET", **kwargs):
+        sent.append(params)
+        return DummyResp("normal")
+    monkeypatch.setattr("detector.sqli_detector.safe_get", fake_safe_get)
+
+    class F:
+        action = "http://example.com/search"
+        method = "get"
+        inputs = [{"name": "q", "type": "text", "value": ""}]
+    SQLiDetector(stages=("error",), max_payloads=2).test_form(F)
+    assert len(sent) == 1 + 2               # baseline + capped error-based payloads, no union/time
+
+
+def test_request_budget(monkeypatch):
+    monkeypatch.setattr(http_utils, "throttle", lambda: None)
+    monkeypatch.setattr(http_utils.session, "request", lambda *a, **kw: DummyResp("ok"))
+    http_utils.set_request_budget(2)
+    try:
+        assert http_utils.safe_get("http://example.com/") is not None
+        assert http_utils.safe_get("http://example.com/") is not None
+        assert http_utils.safe_get("http://example.com/") is None
+        assert http_utils.budget_exhausted()
+    finally:
+        http_utils.set_request_budget(0)
@@ -0,0 +1,47 @@
+# tests/test_reporter.py
+import json
+import pytest
+from reporter.engine import write_reports
+from reporter.aggregate import FindingsAggregator
+
+def make_findings(n):
+    out = []
+    for i in range(n):
+        out.append({"type": "SQLi" if i % 2 else "XSS", "param": f"p{i % 3}", "payload": "<script>alert(1)</script>",
+                    "evidence": "Payload reflected in response", "url": f"http://example.com/{i % 4}",
+                    "severity": "High" if i % 2 else "Medium"})
+    return out
+
+def test_aggregator_pages_split_groups():
+    agg = FindingsAggregator()
+    for f in make_findings(10):
+        agg.add(f)
+    pages = list(agg.pages(4))
+    assert [sum(len(s["findings"]) for s in p) for p in pages] == [4, 4, 2]
+    # High findings come first
+    assert pages[0][0]["severity"] == "High"
+    assert agg.summary()["by_type"] == {"SQLi": 5, "XSS": 5}
+
+def test_write_all_formats(tmp_path):
+    out = str(tmp_path / "report.html")
+    paths = write_reports("http://example.com", 3, make_findings(5), out,
+                          formats=("html", "json", "sarif"), page_size=2)
+    html = open(paths["html"], encoding="utf-8").read()
+    # payloads are escaped, report is split into 3 parts
+    assert "<script>alert(1)</script>" not in html
+    assert (tmp_path / "report_p3.html").exists()
+
+    data = json.load(open(paths["json"], encoding="utf-8"))
+    assert len(data["findings"]) == 5 and data["summary"]["total"] == 5
+
+    sarif = json.load(open(paths["sarif"], encoding="utf-8"))
+    run = sarif["runs"][0]
+    assert sarif["version"] == "2.1.0"
+    assert len(run["results"]) == 5
+    assert {r["id"] for r in run["tool"]["driver"]["rules"]} == {"SQLi", "XSS"}
+    assert {r["level"] for r in run["results"]} == {"error", "warning"}
+
+def test_empty_report(tmp_path):
+    paths = write_reports("http://example.com", 0, [], str(tmp_path / "r.html"), formats=("html", "json"))
+    assert json.load(open(paths["json"]))["findings"] == []
+    assert not (tmp_path / "r_p2.html").exists()
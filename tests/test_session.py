@@ -0,0 +1,101 @@
+# tests/test_session.py
+import threading
+import pytest
+import requests
+from benchmarks.mock_app import start_mock_app
+from crawler.crawler import Crawler
+from utils.session import SessionManager
+
+class DummyResp:
+    def __init__(self, text, url="http://example.com/index.php"):
+        self.text = text
+        self.url = url
+        self.status_code = 200
+
+def make_manager(base="http://example.com"):
+    return SessionManager(requests.Session(), base, login_url=base + "/login.php",
+                          login_data={"username": "admin", "password": "password"})
+
+def test_excluded_links():
+    m = make_manager()
+    assert m.is_excluded("http://example.com/logout.php")
+    assert m.is_excluded("http://example.com/setup.php")
+    assert not m.is_excluded("http://example.com/vulnerabilities/sqli/")
+    assert m.is_excluded("http://example.com/user/delete/3")
+    assert m.is_excluded("http://example.com/items.php?action=remove&id=2")
+    assert m.is_excluded("http://example.com/signout")
+    # host names and words merely containing a verb are not destructive links
+    assert not m.is_excluded("http://backdrop.corp/")
+    assert not m.is_excluded("http://backdrop.corp/index.php")
+    assert not m.is_excluded("http://example.com/products/dropdown.php")
+    assert not m.is_excluded("http://example.com/reset-filters.php")
+    assert not m.is_excluded("http://example.com/leave/removed-items")
+
+def test_is_logged_out():
+    m = make_manager()
+    assert m.is_logged_out(DummyResp("", url="http://example.com/login.php"))
+    login_form = '<form action="login.php" method="post"><input type="password" name="password"></form>'
+    assert m.is_logged_out(DummyResp(login_form))
+    # a password-change form is not a login page
+    assert not m.is_logged_out(DummyResp('<form action="#"><input type="password" name="password_new"></form>'))
+
+def test_is_logged_out_does_not_decode_ordinary_pages():
+    class BytesResp(DummyResp):
+        encoding = "utf-8"
+
+        def __init__(self, content):
+            super().__init__(None)
+            self.content = content
+
+        @property
+        def text(self):
+            raise AssertionError("response decoded on the I/O thread")
+
+        @text.setter
+        def text(self, value):
+            pass
+
+    m = make_manager()
+    assert not m.is_logged_out(BytesResp(b"<html>" + b"x" * 10000 + b"</html>"))
+
+def test_relogin_happens_once_for_concurrent_workers(monkeypatch):
+    m = make_manager()
+    calls = []
+    monkeypatch.setattr(m, "login", lambda: calls.append(1) or True)
+    gen = m.generation
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(m.relogin(gen))) for _ in range(8)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert len(calls) == 1
+    assert all(results) and m.generation == gen + 1
+
+def test_crawl_survives_session_expiry():
+    server, url = start_mock_app(pages=6, forms_per_page=1, login=True, session_max_requests=5)
+    try:
+        base = url.rstrip("/")
+        c = Crawler(url, max_pages=20, login_url=base + "/login.php",
+                    login_data={"username": "admin", "password": "password", "Login": "Login"})
+        pages = c.crawl()
+        assert not any("logout" in p.url for p in pages)
+        assert sum(len(p.forms) for p in pages) == 6       # every page was crawled logged in
+        assert c.session_manager.relogins > 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_crawl_relogins_when_login_form_is_served_in_place():
+    # no redirect: the expired session gets the login form with HTTP 200 on the page URL
+    server, url = start_mock_app(pages=6, forms_per_page=1, login=True, login_redirect=False, session_max_requests=8)
+    try:
+        base = url.rstrip("/")
+        c = Crawler(url, max_pages=20, login_url=base + "/login.php",
+                    login_data={"username": "admin", "password": "password", "Login": "Login"})
+        pages = c.crawl()
+        assert sum(len(p.forms) for p in pages) == 6
+        assert c.session_manager.relogins > 0 and c.session_manager.replayed == c.session_manager.relogins
+    finally:
+        server.shutdown()
+        server.server_close()
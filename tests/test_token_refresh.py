@@ -0,0 +1,73 @@
+# tests/test_token_refresh.py
+import threading
+import pytest
+from benchmarks.mock_app import start_mock_app
+from crawler.crawler import Crawler
+from detector.sqli_detector import SQLiDetector
+from detector.xss_detector import XSSDetector
+from detector.token_refresh import TokenManager
+
+@pytest.fixture
+def token_app():
+    server, url = start_mock_app(pages=1, forms_per_page=2, params_per_form=1, csrf_tokens=True)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+def crawl_forms(url):
+    pages = Crawler(url, max_pages=5).crawl()
+    return [f for p in pages for f in p.forms]
+
+def test_token_fields_learned(token_app):
+    form = crawl_forms(token_app)[0]
+    tokens = TokenManager()
+    assert tokens.token_fields(form) == {"user_token"}
+    assert tokens.fetched == 1          # one refetch to see the value rotate
+    tokens.token_fields(form)
+    assert tokens.fetched == 1          # learned once per form
+
+def test_static_token_is_not_refreshed():
+    server, url = start_mock_app(pages=1, forms_per_page=1, params_per_form=1, csrf_tokens="static")
+    try:
+        form = crawl_forms(url)[0]
+        tokens = TokenManager()
+        assert tokens.token_fields(form) == frozenset()
+        assert any(f["type"] == "SQLi" for f in SQLiDetector(tokens=tokens).test_form(form))
+        assert tokens.fetched == 1      # the learning GET only, none per probe
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@pytest.mark.parametrize("mode", ["per-probe", "bulk"])
+def test_probes_use_fresh_tokens(token_app, mode):
+    forms = crawl_forms(token_app)
+    # without refresh only the baseline request carries a valid token, every probe is rejected
+    assert not SQLiDetector().test_form(forms[0])
+    tokens = TokenManager(mode=mode, prefetch=1)
+    assert any(f["type"] == "SQLi" for f in SQLiDetector(tokens=tokens).test_form(forms[0]))
+    assert XSSDetector(tokens=tokens).test_form(forms[1])
+
+def test_concurrent_probes_on_one_form(token_app):
+    form = crawl_forms(token_app)[0]
+    tokens = TokenManager()
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(XSSDetector(tokens=tokens).test_form(form)))
+               for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert all(r for r in results)
+
+def test_concurrent_probes_on_forms_of_one_page(token_app):
+    # refetching the page rotates the tokens of both forms, so their probes must not interleave
+    forms = crawl_forms(token_app)
+    tokens = TokenManager()
+    results = []
+    workers = [threading.Thread(target=lambda f=forms[i % 2]: results.append(XSSDetector(tokens=tokens).test_form(f)))
+               for i in range(6)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert len(results) == 6 and all(r for r in results)
@@ -0,0 +1,160 @@
+# utils/analysis.py
+"""
+响应分析进程池：把 CPU 密集的响应处理（解码 r.text、BeautifulSoup 解析、SQL 错误指纹匹配、payload 反射检查）
+从 I/O 线程移到独立进程，绕开 GIL，吞吐随 CPU 核数扩展。
+    pool = AnalysisPool(workers=8, batch_size=16)
+    install_pool(pool)                                   # scanner.scan_target 按 profile.analysis_workers 安装
+    body, encoding = response_body(r)                    # 有进程池时交出原始 bytes，由 worker 解码
+    sql_error, reflected, length = analyze(match_response, body, encoding, payload)
+    pool.close()
+
+- 没有安装进程池时 analyze / submit 直接在当前线程执行，行为与以前完全一致。
+- 被分析的函数必须是模块级函数（按名字 pickle），参数 / 返回值只用 bytes、str、tuple、dict 等简单类型。
+- 批量提交：有空闲 worker 时立即派发（低负载下没有额外延迟）；worker 全忙时请求先在本地排队，
+  攒满 batch_size 个或有 worker 空出来时一次性发送，减少进程间通信次数。
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from requests.compat import chardet
+
+DEFAULT_BATCH_SIZE = 16
+
+_pool = None
+
+
+def install_pool(pool):
+    """Route analyze/submit through `pool` (None: run analysis inline in the calling thread)."""
+    global _pool
+    _pool = pool
+
+
+def decode(body, encoding=None):
+    """bytes -> str the way requests' r.text does (charset detection when the response has no charset)."""
+    if isinstance(body, str):
+        return body
+    if not body:
+        return ""
+    if not encoding:
+        encoding = chardet.detect(body)["encoding"] or "utf-8"
+    try:
+        return str(body, encoding, errors="replace")
+    except LookupError:
+        return str(body, "utf-8", errors="replace")
+
+
+def response_body(r):
+    """
+    (body, encoding) to hand to an analysis function: the raw bytes when a pool is installed (decoding
+    happens in the worker), otherwise r.text so the inline path decodes exactly once, as before.
+    """
+    content = getattr(r, "content", None)
+    if _pool is not None and isinstance(content, bytes):
+        return content, r.encoding
+    return r.text or "", None
+
+
+def _run_batch(calls):
+    """Worker side: run every (func, args) and return [(ok, result_or_exception)]."""
+    results = []
+    for func, args in calls:
+        try:
+            results.append((True, func(*args)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+class AnalysisPool:
+    def __init__(self, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = max(1, batch_size)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._cond = threading.Condition()
+        self._pending = []            # [(future, func, args)] not yet sent to a worker
+        self._in_flight = 0           # batches sent and not finished
+        self._closed = False
+        self.tasks = 0
+        self.batches = 0
+        # executor.submit is only called from this thread (not from done callbacks)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="analysis-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, func, *args):
+        """Queue func(*args) for a worker process; returns a concurrent.futures.Future."""
+        fut = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("AnalysisPool is closed")
+            self._pending.append((fut, func, args))
+            self._cond.notify()
+        return fut
+
+    def _ready(self):
+        # with _cond held: idle worker -> send whatever is queued; all busy -> only full batches
+        return self._pending and (self._closed or self._in_flight < self.workers
+                                  or len(self._pending) >= self.batch_size)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._ready() or (self._closed and not self._pending))
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+                self._in_flight += 1
+                self.batches += 1
+                self.tasks += len(batch)
+            try:
+                done = self._executor.submit(_run_batch, [(func, args) for _, func, args in batch])
+            except Exception as e:           # BrokenProcessPool, shutdown ...
+                self._finish(batch, None, e)
+                continue
+            done.add_done_callback(lambda f, batch=batch: self._finish(batch, f))
+
+    def _finish(self, batch, done, error=None):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+        if error is None:
+            error = done.exception()
+        if error is not None:
+            for fut, _, _ in batch:
+                fut.set_exception(error)
+            return
+        for (fut, _, _), (ok, value) in zip(batch, done.result()):
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+
+    def close(self):
+        """Send what is still queued, wait for it and stop the workers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        return {"analysis_workers": self.workers, "analysis_tasks": self.tasks, "analysis_batches": self.batches}
+
+
+def submit(func, *args):
+    """Future of func(*args): on the installed pool, or already completed when running inline."""
+    if _pool is not None:
+        return _pool.submit(func, *args)
+    fut = Future()
+    try:
+        fut.set_result(func(*args))
+    except Exception as e:
+        fut.set_exception(e)
+    return fut
+
+
+def analyze(func, *args):
+    """func(*args) on the installed pool (blocking the calling I/O thread only), or inline."""
+    if _pool is not None:
+        return _pool.submit(func, *args).result()
+    return func(*args)
@@ -1,16 +1,98 @@
 # utils/http.py
+import threading
+import time
 import requests
+from urllib3.util.request import ACCEPT_ENCODING
 from config import USER_AGENT, DEFAULT_TIMEOUT
+from utils.metrics import metrics
 
+# ACCEPT_ENCODING is "gzip,deflate" plus "br" / "zstd" when brotli / zstandard are installed (urllib3 decodes them)
 session = requests.Session()
-session.headers.update({"User-Agent": USER_AGENT})
+session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING})
+
+# optional utils.session.SessionManager: re-logins and replays requests that hit the login page
+_session_manager = None
+
+def install_session_manager(manager):
+    """Route safe_get through `manager` (None restores plain session requests)."""
+    global _session_manager
+    _session_manager = manager
+
+# politeness: minimum interval (seconds) between two requests sent from this process
+_request_delay = 0.0
+_last_request = 0.0
+_throttle_lock = threading.Lock()
+
+# request budget per scan (0 = unlimited); once spent, safe_get returns None without sending
+_budget = 0
+_budget_used = 0
+_budget_lock = threading.Lock()
+
+def set_request_budget(max_requests):
+    """Start a new budget of `max_requests` requests (0 disables the limit)."""
+    global _budget, _budget_used
+    with _budget_lock:
+        _budget = max(0, int(max_requests or 0))
+        _budget_used = 0
+
+def consume_budget():
+    """Reserve one request from the budget; False if the budget is exhausted."""
+    global _budget_used
+    if not _budget:
+        return True
+    with _budget_lock:
+        if _budget_used >= _budget:
+            return False
+        _budget_used += 1
+        return True
+
+def budget_exhausted():
+    return bool(_budget) and _budget_used >= _budget
+
+# per-thread request counter (lets callers measure how many requests a unit of work cost)
+_local = threading.local()
+
+def request_count():
+    """Number of requests sent by safe_get from the current thread."""
+    return getattr(_local, "count", 0)
+
+def refused_count():
+    """Number of safe_get calls from the current thread that the request budget refused."""
+    return getattr(_local, "refused", 0)
+
+def set_request_delay(seconds):
+    global _request_delay
+    _request_delay = max(0.0, float(seconds or 0))
+
+def throttle():
+    """Block until at least `_request_delay` seconds passed since the previous request."""
+    global _last_request
+    if _request_delay <= 0:
+        return
+    with _throttle_lock:
+        wait = _last_request + _request_delay - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request = time.monotonic()
 
 def safe_get(url, params=None, data=None, method="GET", timeout=DEFAULT_TIMEOUT, allow_redirects=True):
+    if not consume_budget():
+        _local.refused = getattr(_local, "refused", 0) + 1
+        return None
+    throttle()
+    _local.count = getattr(_local, "count", 0) + 1
     try:
-        if method.upper() == "GET":
-            r = session.get(url, params=params, timeout=timeout, allow_redirects=allow_redirects)
-        else:
-            r = session.post(url, data=data, timeout=timeout, allow_redirects=allow_redirects)
+        with metrics.request():
+            if _session_manager is not None:
+                if method.upper() == "GET":
+                    r = _session_manager.request("GET", url, params=params, timeout=timeout, allow_redirects=allow_redirects)
+                else:
+                    r = _session_manager.request("POST", url, data=data, timeout=timeout, allow_redirects=allow_redirects)
+            elif method.upper() == "GET":
+                r = session.get(url, params=params, timeout=timeout, allow_redirects=allow_redirects)
+            else:
+                r = session.post(url, data=data, timeout=timeout, allow_redirects=allow_redirects)
         return r
     except Exception as e:
+        metrics.request_failed()
         return None
@@ -1,21 +1,196 @@
 # utils/logger.py
 """
-简单封装的 logger，项目各处可以 import 并使用：
-from utils.logger import get_logger
-logger = get_logger(__name__)
-logger.info("...")
-保持最低限度，默认打印到 stdout。
+项目统一的日志层（替代各处的 print），项目各处可以 import 并使用：
+    from utils.logger import get_logger, SAMPLED
+    logger = get_logger("crawler")                    # 子系统名：crawler / detector.sqli / session / scanner ...
+    logger.info("Crawled %d pages", n)                # 用 %s 参数而不是 f-string：级别关闭时不做格式化
+    logger.debug("probe %s", url, extra=SAMPLED)      # 每请求一次的事件：按 sample 比例采样
+
+非阻塞：所有子系统 logger 都挂在 "lwvs" 根 logger 下，只有一个 QueueHandler；格式化和写 stdout / 文件
+都在 QueueListener 的后台线程里完成，扫描线程只做一次入队，多线程输出也不会交错。
+
+    setup_logging(level="INFO", fmt="json", levels={"crawler": "DEBUG"}, sample=0.01, path="scan.log")
+
+- fmt: "text"（默认）或 "json"（每行一个 JSON 对象，extra= 传入的字段原样输出）
+- levels: 按子系统设置级别（"detector" 同时作用于 detector.sqli / detector.xss ...）
+- sample: 带 extra=SAMPLED 的记录只保留 1/round(1/sample) 条（按 logger 计数，结果可复现）
+没有调用 setup_logging 时，第一次 get_logger 会按默认配置（INFO、text、stdout）初始化。
+import 模块不会启动任何线程：listener 线程在（每个进程）第一条日志入队时才启动。
 """
 
+import atexit
+import itertools
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+from datetime import datetime, timezone
+
+ROOT = "lwvs"
+FORMATS = ("text", "json")
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+# pass as extra= on per-request events so they are subject to sampling
+SAMPLED = {"sample": True}
+
+# attributes every LogRecord has; anything else came in through extra= and goes into the JSON output
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "sample"}
+
+_lock = threading.Lock()
+_queue = None
+_outputs = []           # handlers the listener writes to
+_listener = None
+_listener_pid = None    # process the running listener thread belongs to
+_config = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger (without the "lwvs." prefix), msg + extra fields."""
+
+    def format(self, record):
+        name = record.name[len(ROOT) + 1:] if record.name.startswith(ROOT + ".") else record.name
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.processName != "MainProcess":        # batch worker
+            entry["process"] = record.process
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SampleFilter(logging.Filter):
+    """Keep every n-th record marked with extra=SAMPLED (per logger); unmarked records always pass."""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counters = {}
+
+    def filter(self, record):
+        if not getattr(record, "sample", False) or self.every == 1:
+            return True
+        if not self.every:
+            return False
+        counter = self._counters.get(record.name)
+        if counter is None:
+            counter = self._counters.setdefault(record.name, itertools.count())
+        return next(counter) % self.every == 0
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that starts the listener thread on the first record of each process."""
+
+    def emit(self, record):
+        if _listener_pid != os.getpid():
+            _start_listener()
+        super().emit(record)
+
+
+def _start_listener():
+    global _listener, _listener_pid
+    with _lock:
+        if _listener_pid == os.getpid() or _queue is None:
+            return
+        # after a fork the inherited listener has no thread here: start a fresh one on the same queue
+        _listener = logging.handlers.QueueListener(_queue, *_outputs, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+
+def _parse_level(level):
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level {level!r}")
+    return value
+
+
+def parse_levels(items):
+    """["crawler=DEBUG", "detector=WARNING"] -> {"crawler": "DEBUG", "detector": "WARNING"} (CLI helper)."""
+    levels = {}
+    for item in items or []:
+        name, sep, level = (part.strip() for part in item.partition("="))
+        if not sep or not name:
+            raise ValueError(f"Expected SUBSYSTEM=LEVEL, got {item!r}")
+        _parse_level(level)
+        levels[name] = level.upper()
+    return levels
+
+
+def setup_logging(level="INFO", fmt="text", levels=None, sample=1.0, path=None):
+    """
+    (Re)configure the queue-based logging layer. Safe to call again, e.g. in batch worker processes
+    (pass logging_config() from the parent). The listener thread starts with the first record.
+    """
+    global _queue, _outputs, _config
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown log format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    with _lock:
+        _stop_listener()
+        for handler in _outputs:
+            handler.close()
+        root = logging.getLogger(ROOT)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(_parse_level(level))
+        root.propagate = False
+        # forget per-subsystem levels from a previous configuration
+        for name, logger in list(logging.Logger.manager.loggerDict.items()):
+            if name.startswith(ROOT + ".") and isinstance(logger, logging.Logger):
+                logger.setLevel(logging.NOTSET)
+        for name, sub_level in (levels or {}).items():
+            logging.getLogger(f"{ROOT}.{name}").setLevel(_parse_level(sub_level))
+
+        formatter = JSONFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+        out = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler(sys.stdout)
+        out.setFormatter(formatter)
+        _queue = queue.SimpleQueue()
+        _outputs = [out]
+        handler = _LazyQueueHandler(_queue)
+        handler.addFilter(SampleFilter(sample))     # drop sampled-out records before they are enqueued
+        root.addHandler(handler)
+        _config = {"level": level, "fmt": fmt, "levels": dict(levels or {}), "sample": sample, "path": path}
+
+
+def _stop_listener():
+    global _listener, _listener_pid
+    # a listener inherited through fork has no running thread in this process: just drop it
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+    _listener_pid = None
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread (registered with atexit)."""
+    with _lock:
+        _stop_listener()
+
+
+def logging_config():
+    """Keyword arguments of the current setup_logging() call (None if never configured)."""
+    return dict(_config) if _config else None
+
+
+atexit.register(shutdown_logging)
+
 
-def get_logger(name=__name__, level=logging.INFO):
-    logger = logging.getLogger(name)
-    if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        fmt = "%(asctime)s %(levelname)s %(name)s: %(message)s"
-        handler.setFormatter(logging.Formatter(fmt))
-        logger.addHandler(handler)
-    logger.setLevel(level)
+def get_logger(name=__name__, level=None):
+    """Logger for subsystem `name` under the shared queue handler; `level` overrides its level."""
+    if _config is None:
+        setup_logging()
+    logger = logging.getLogger(f"{ROOT}.{name}")
+    if level is not None:
+        logger.setLevel(_parse_level(level))
     return logger
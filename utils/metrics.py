@@ -0,0 +1,239 @@
+# utils/metrics.py
+"""
+扫描性能指标（进程内，线程安全）
+用法：
+    from utils.metrics import metrics
+    with metrics.detector("sqli"), metrics.phase("payload"):
+        ...                       # utils.http.safe_get 自动记录延迟 / 并发
+    metrics.export("metrics.json")   # 或 "metrics.prom"（Prometheus textfile 格式）
+
+记录内容：
+- 按阶段（login / crawl / baseline / payload / time-based）划分的请求延迟直方图
+- 每个 detector 发出的请求数
+- 每个页面的解析耗时
+- 缓存命中率（cache_hit / cache_miss，按名字区分）
+- 当前 / 峰值 in-flight 请求数
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from utils.logger import get_logger
+
+logger = get_logger("metrics")
+
+# latency buckets in seconds (upper bounds, Prometheus style)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PARSE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Approximate quantile: upper bound of the bucket containing the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 6),
+            "buckets": {str(b): c for b, c in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.latency = {}            # phase -> Histogram
+            self.detector_requests = {}  # detector -> count
+            self.parse_time = Histogram(PARSE_BUCKETS)
+            self.cache = {}              # name -> [hits, misses]
+            self.pages = 0
+            self.errors = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+    # ---- thread-local context -------------------------------------------------
+    @contextmanager
+    def _context(self, attr, value):
+        prev = getattr(self._local, attr, None)
+        setattr(self._local, attr, value)
+        try:
+            yield
+        finally:
+            setattr(self._local, attr, prev)
+
+    def phase(self, name):
+        """Label requests sent inside the block with a phase (login/crawl/baseline/payload/time-based)."""
+        return self._context("phase", name)
+
+    def detector(self, name):
+        """Attribute requests sent inside the block to a detector."""
+        return self._context("detector", name)
+
+    @contextmanager
+    def request(self):
+        """Wrap one HTTP request: tracks in-flight concurrency and latency for the current phase."""
+        phase = getattr(self._local, "phase", None) or "other"
+        det = getattr(self._local, "detector", None)
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.in_flight -= 1
+                self.latency.setdefault(phase, Histogram()).observe(elapsed)
+                if det:
+                    self.detector_requests[det] = self.detector_requests.get(det, 0) + 1
+
+    # ---- simple counters ------------------------------------------------------
+    def observe_parse(self, seconds):
+        with self._lock:
+            self.pages += 1
+            self.parse_time.observe(seconds)
+
+    def request_failed(self):
+        with self._lock:
+            self.errors += 1
+
+    def cache_hit(self, name):
+        with self._lock:
+            self.cache.setdefault(name, [0, 0])[0] += 1
+
+    def cache_miss(self, name):
+        with self._lock:
+            self.cache.setdefault(name, [0, 0])[1] += 1
+
+    # ---- output ---------------------------------------------------------------
+    def total_requests(self):
+        return sum(h.count for h in self.latency.values())
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.time() - self.started
+            total = sum(h.count for h in self.latency.values())
+            return {
+                "elapsed": round(elapsed, 3),
+                "requests": total,
+                "requests_per_sec": round(total / elapsed, 3) if elapsed > 0 else 0.0,
+                "errors": self.errors,
+                "latency": {p: h.to_dict() for p, h in sorted(self.latency.items())},
+                "detector_requests": dict(self.detector_requests),
+                "pages": self.pages,
+                "parse_time": self.parse_time.to_dict(),
+                "cache": {name: {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 4) if h + m else 0.0}
+                          for name, (h, m) in self.cache.items()},
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+            }
+
+    def progress_line(self):
+        s = self.snapshot()
+        by_det = " ".join(f"{k}={v}" for k, v in sorted(s["detector_requests"].items()))
+        return (f"[progress] {s['elapsed']:.0f}s pages={s['pages']} requests={s['requests']} "
+                f"({s['requests_per_sec']:.1f}/s) in_flight={s['in_flight']} errors={s['errors']} {by_det}").rstrip()
+
+    def to_prometheus(self, prefix="webscanner"):
+        s = self.snapshot()
+        lines = []
+
+        def hist(name, help_text, label, data):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for key, h in data:
+                lbl = f'{label}="{key}",' if label else ""
+                cumulative = 0
+                for bucket, c in h["buckets"].items():
+                    cumulative += c
+                    lines.append(f'{prefix}_{name}_bucket{{{lbl}le="{bucket}"}} {cumulative}')
+                lbl = f'{{{label}="{key}"}}' if label else ""
+                lines.append(f"{prefix}_{name}_sum{lbl} {h['sum']}")
+                lines.append(f"{prefix}_{name}_count{lbl} {h['count']}")
+
+        hist("request_duration_seconds", "HTTP request latency by scan phase", "phase", s["latency"].items())
+        hist("page_parse_seconds", "HTML parse time per crawled page", None, [(None, s["parse_time"])])
+        lines.append(f"# TYPE {prefix}_detector_requests_total counter")
+        for det, n in sorted(s["detector_requests"].items()):
+            lines.append(f'{prefix}_detector_requests_total{{detector="{det}"}} {n}')
+        lines.append(f"# TYPE {prefix}_cache_hits_total counter")
+        for name, c in sorted(s["cache"].items()):
+            lines.append(f'{prefix}_cache_hits_total{{cache="{name}"}} {c["hits"]}')
+        lines.append(f"# TYPE {prefix}_cache_misses_total counter")
+        for name, c in sorted(s["cache"].items()):
+            lines.append(f'{prefix}_cache_misses_total{{cache="{name}"}} {c["misses"]}')
+        lines.append(f"# TYPE {prefix}_request_errors_total counter")
+        lines.append(f"{prefix}_request_errors_total {s['errors']}")
+        lines.append(f"# TYPE {prefix}_in_flight_requests_max gauge")
+        lines.append(f"{prefix}_in_flight_requests_max {s['max_in_flight']}")
+        lines.append(f"# TYPE {prefix}_scan_duration_seconds gauge")
+        lines.append(f"{prefix}_scan_duration_seconds {s['elapsed']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write metrics to `path`: Prometheus textfile if it ends with .prom, JSON otherwise."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+        return path
+
+
+class ProgressReporter(threading.Thread):
+    """Background thread printing metrics.progress_line() every `interval` seconds."""
+
+    def __init__(self, m, interval=15.0):
+        super().__init__(daemon=True)
+        self.metrics = m
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            logger.info(self.metrics.progress_line())
+
+    def stop(self):
+        self._stop_event.set()
+
+
+metrics = Metrics()
@@ -0,0 +1,238 @@
+# utils/session.py
+"""
+会话管理：登录、掉线检测、自动重新登录、危险链接过滤。
+    manager = SessionManager(http_utils.session, base_url, login_url, login_data)
+    manager.login()
+    http_utils.install_session_manager(manager)   # safe_get 之后的请求都经过 manager.request
+    r = manager.request("GET", url, timeout=10)    # 掉线时自动重新登录并重放请求
+
+掉线判定（只在配置了 login_url 时生效）：
+- 请求被重定向到登录页（最终 URL 的 path 与 login_url 相同）
+- 或响应中出现登录表单指纹（action 指向登录页 + password 输入框）
+重新登录在锁内进行，并用 generation 计数保证并发 worker 同时发现掉线时只登录一次，
+其余 worker 等待后直接重放请求。
+"""
+
+import re
+import threading
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
+from utils.metrics import metrics
+from utils.analysis import analyze, decode, response_body
+from utils.logger import get_logger
+
+logger = get_logger("session")
+
+# links the crawler must never follow: they end the session or change server state.
+# Matched against path + query only (never the host), and only as a whole path segment, file name
+# (any extension) or query key/value: /logout.php, /user/delete/3, ?action=reset -- but not
+# /products/dropdown.php or /reset-filters.php.
+_VERB = r"(?:^|[/?&=]){}(?:\.\w+)?(?:[/?&#=]|$)"
+DEFAULT_EXCLUDE_PATTERNS = [
+    _VERB.format(r"(?:log[-_]?out|sign[-_]?out|log[-_]?off)"),
+    r"(?:^|/)setup\.php(?:[?#]|$)",
+    _VERB.format(r"(?:delete|destroy|remove|reset|drop)"),
+]
+PASSWORD_INPUT_RE = re.compile(r"<input[^>]*type\s*=\s*[\"']?password", re.IGNORECASE)
+# indicators that the base page is rendered for a logged-in user (DVWA)
+LOGGED_IN_MARKERS = ("Logout", "logout.php", "Security Level", "Username:")
+
+
+def login_form_served(body, encoding, login_page):
+    """Login-form fingerprint: a password input plus a form posting to the login page (analysis worker safe)."""
+    text = decode(body, encoding)
+    return bool(PASSWORD_INPUT_RE.search(text)) and f'action="{login_page}"' in text.replace("'", '"')
+
+
+class SessionManager:
+    def __init__(self, session, base_url, login_url=None, login_data=None,
+                 exclude_patterns=None, max_failed_relogins=3, timeout=10):
+        self.session = session
+        self.base_url = base_url
+        self.login_url = login_url
+        self.login_data = login_data
+        self.max_failed_relogins = max_failed_relogins
+        self.timeout = timeout
+        patterns = DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None else exclude_patterns
+        self._exclude = [re.compile(p, re.IGNORECASE) for p in patterns]
+        self._lock = threading.Lock()
+        self.generation = 0          # bumped after every successful (re-)login
+        self.relogins = 0
+        self.failed_relogins = 0     # consecutive failures; give up once max_failed_relogins is reached
+        self.replayed = 0
+
+    # ---- link filtering -------------------------------------------------------
+    def is_excluded(self, url):
+        """True for logout / destructive links that must not be requested (patterns see path + query)."""
+        parsed = urlparse(url)
+        target = parsed.path + ("?" + parsed.query if parsed.query else "")
+        return any(p.search(target) for p in self._exclude)
+
+    # ---- auth state -----------------------------------------------------------
+    def _is_login_url(self, url):
+        return bool(self.login_url) and urlparse(url).path == urlparse(self.login_url).path
+
+    def is_logged_out(self, r, body=None):
+        """
+        Detect a response that was served because the session is no longer authenticated.
+        body: (body, encoding) already read from a streamed response (its r.content is gone then).
+        """
+        if not self.login_url or r is None:
+            return False
+        if self._is_login_url(getattr(r, "url", "") or ""):
+            return True
+        # don't pull (possibly streamed) binary bodies just to look for a login form
+        ctype = (getattr(r, "headers", None) or {}).get("Content-Type", "")
+        if ctype and "html" not in ctype.lower():
+            return False
+        login_page = urlparse(self.login_url).path.rsplit("/", 1)[-1]
+        if body is None:
+            content = getattr(r, "content", None)
+            body = (content, r.encoding) if isinstance(content, bytes) else response_body(r)
+        # hot path: a plain bytes search rules out almost every response without decoding it here
+        if isinstance(body[0], bytes) and login_page.encode() not in body[0]:
+            return False
+        return analyze(login_form_served, body[0], body[1], login_page)
+
+    def login(self):
+        """
+        <<< MODIFIED >>>
+        基于 DVWA 登录:
+        1) 获取登录页面，查找动作以‘login.php’结尾的表单
+        2) 提取表单中的输入（用户名、密码、登录和隐藏的user_token）
+        3) 将提取的隐藏输入合并到login_data和POST中
+        4) 通过检查基本页面的“Logout”或其他指标来验证登录
+        返回是否登录成功。
+        """
+        if not (self.login_url and self.login_data):
+            return False
+        with metrics.phase("login"):
+            return self._login()
+
+    def _login(self):
+        login_url, login_data = self.login_url, self.login_data
+        try:
+            # 1) GET login page to extract token and real form fields
+            with metrics.request():
+                r_get = self.session.get(login_url, timeout=self.timeout, allow_redirects=True)
+            if not r_get:
+                logger.warning("Failed to GET login page: %s", login_url)
+                return False
+            soup = BeautifulSoup(r_get.text, "lxml")
+
+            # Find the form element that posts to login.php (relative or absolute)
+            login_form = None
+            for f in soup.find_all("form"):
+                action = f.get("action", "")
+                # normalize action to check endswith login.php
+                if action and action.strip().lower().endswith("login.php"):
+                    login_form = f
+                    break
+            # fallback: if not found, just take the first form
+            if login_form is None:
+                forms = soup.find_all("form")
+                if forms:
+                    login_form = forms[0]
+
+            # collect default hidden/input fields from the login form
+            extracted = {}
+            if login_form:
+                for inp in login_form.find_all(["input", "textarea", "select"]):
+                    name = inp.get("name")
+                    if not name:
+                        continue
+                    # prioritize hidden or existing values
+                    val = inp.get("value", "")
+                    typ = inp.get("type", "").lower()
+                    # include hidden token or other hidden defaults
+                    if typ == "hidden" or val:
+                        extracted[name] = val
+
+            # 2) merge provided login_data with extracted hidden inputs (without overwriting username/password if present)
+            merged = {}
+            merged.update(extracted)      # hidden fields first
+            merged.update(login_data or {})  # provided username/password override if present
+            # Ensure "Login" submit value exists if form used a submit input with name=Login
+            if "Login" not in merged:
+                # try to see if login_form has a submit input with name "Login"
+                if login_form:
+                    sub = login_form.find("input", {"type": "submit"})
+                    if sub and sub.get("name"):
+                        merged[sub.get("name")] = sub.get("value", "")
+                    else:
+                        # default DVWA uses name "Login"
+                        merged["Login"] = "Login"
+                else:
+                    merged["Login"] = "Login"
+
+            # 3) POST to login_url (use absolute URL)
+            post_url = urljoin(login_url, login_form.get("action")) if login_form and login_form.get("action") else login_url
+            with metrics.request():
+                r_post = self.session.post(post_url, data=merged, timeout=self.timeout, allow_redirects=True)
+
+            # 4) verify: request base page and check for indicators of logged-in state
+            with metrics.request():
+                r_check = self.session.get(self.base_url, timeout=self.timeout, allow_redirects=True)
+            check_text = r_check.text if r_check else ""
+            if r_check and any(m in check_text for m in LOGGED_IN_MARKERS):
+                logger.info("Login successful")
+                return True
+            logger.warning("Login may have failed (post_status=%s).", getattr(r_post, 'status_code', None))
+            # log snippet to help debugging
+            logger.debug("post-login page snippet: %r", (check_text or "")[:400].replace("\n", " "))
+            return False
+
+        except Exception as e:
+            logger.warning("Login exception: %s", e)
+            return False
+
+    def relogin(self, seen_generation):
+        """
+        Re-run the login flow once for all workers that observed `seen_generation`.
+        Returns True if the caller should replay its request.
+        """
+        with self._lock:
+            if self.generation != seen_generation:
+                return True              # another worker already logged in again
+            if self.failed_relogins >= self.max_failed_relogins:
+                return False
+            self.relogins += 1
+            logger.warning("Session lost, logging in again (#%d)", self.relogins)
+            if not self.login():
+                self.failed_relogins += 1
+                return False
+            self.failed_relogins = 0
+            self.generation += 1
+            return True
+
+    def restore(self, seen_generation):
+        """relogin() for a caller that found a logged-out response; True (and counted) if it should replay."""
+        if not self.relogin(seen_generation):
+            return False
+        with self._lock:
+            self.replayed += 1
+        return True
+
+    # ---- requests -------------------------------------------------------------
+    def request(self, method, url, **kwargs):
+        """session.request() that re-logins and replays once when the session turned out to be dead."""
+        generation = self.generation
+        r = self.session.request(method, url, **kwargs)
+        if self._is_login_url(url):
+            return r
+        if kwargs.get("stream"):
+            # don't pull a streamed body here: only the redirect counts. The caller checks the body it reads
+            # and calls restore() itself when a login form is served in place
+            if r is None or not self._is_login_url(getattr(r, "url", "") or ""):
+                return r
+        elif not self.is_logged_out(r):
+            return r
+        if self.restore(generation):
+            r = self.session.request(method, url, **kwargs)
+        return r
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def stats(self):
+        return {"relogins": self.relogins, "replayed": self.replayed}